@@ -1,14 +1,63 @@
 from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session
 import sqlite3
-from resume_parser import ResumeParser
+import db
+from db import get_db, query, execute, commit
+from resume_parser import warm_up, parser_load_times, MAX_PDF_BYTES
 import os
-import csv
 import io 
-from mail_sender import send_email
+import json
+import time
+import hashlib
+import threading
+from mail_sender import queue_email, start_outbox_sender
+from job_queue import enqueue, get_job, start_workers
+import parse_cache
+import metrics
+from backpressure import limit_concurrency, snapshot as concurrency_snapshot
+from candidate_queries import list_candidates, LIST_COLUMNS, SORTS, DEFAULT_SORT, DEFAULT_PAGE_SIZE
+from change_feed import current_revision, changes_since, DEFAULT_CHANGES_LIMIT
+from aptitude_results import apply_results, ResultsFileError
+from database_setup import create_schema
+from candidate_search import search_candidates, DEFAULT_SEARCH_LIMIT
+from skill_index import find_candidates, DEFAULT_MATCH_LIMIT
 from functools import wraps
+from werkzeug.utils import secure_filename
+from werkzeug.exceptions import ServiceUnavailable
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'a_super_secret_key_change_later'
+app.config['DATABASE'] = db.DB_PATH
+db.init_app(app)
+metrics.init_app(app)
+# Minimum aptitude score for 'Test Cleared'
+app.config['PASSING_SCORE'] = int(os.environ.get('ATS_PASSING_SCORE', '70'))
+# Load the spaCy model at startup instead of on the first application
+app.config['PRELOAD_PARSER'] = os.environ.get('ATS_PRELOAD_PARSER', '0') == '1'
+
+# Number of resume parsing worker processes started alongside the dev server
+app.config['JOB_WORKERS'] = int(os.environ.get('ATS_JOB_WORKERS', '2'))
+# Send queued email from a background thread of the dev server
+app.config['OUTBOX_SENDER'] = os.environ.get('ATS_OUTBOX_SENDER', '1') == '1'
+# Reject /upload bodies that couldn't hold an acceptable resume (form fields get 1 MB of slack).
+# Only that route is capped: HR's results CSVs stream through and can be much larger.
+app.config['UPLOAD_MAX_CONTENT_LENGTH'] = MAX_PDF_BYTES + 1024 * 1024
+# Requests allowed inside each route at once, per web process; the rest wait up to
+# backpressure.QUEUE_TIMEOUT and then get a 503. Each upload holds up to
+# MAX_PDF_BYTES in memory, so its limit also caps memory. 0 means no limit.
+app.config['UPLOAD_CONCURRENCY'] = int(os.environ.get('ATS_UPLOAD_CONCURRENCY', '8'))
+app.config['API_CONCURRENCY'] = int(os.environ.get('ATS_API_CONCURRENCY', '8'))
+# Open /api/candidates/stream connections; each holds a server thread while open
+app.config['STREAM_CONCURRENCY'] = int(os.environ.get('ATS_STREAM_CONCURRENCY', '4'))
+# Seconds before a stream is closed; EventSource reconnects with Last-Event-ID and
+# carries on, and the reconnect goes through the concurrency limit again
+app.config['SSE_MAX_SECONDS'] = int(os.environ.get('ATS_SSE_MAX_SECONDS', '300'))
+# How often a Server-Sent Events stream checks for new revisions
+SSE_POLL_INTERVAL = 2
+# Job ids remembered in an applicant's session cookie for /api/jobs
+SESSION_JOBS = 10
+
+if app.config['PRELOAD_PARSER']:
+    warm_up()
 
 # --- NEW: Login required decorator ---
 def login_required(f):
@@ -19,6 +68,26 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def max_content_length(config_key):
+    """Caps the request body for one route at app.config[config_key] bytes; larger ones get a 413."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            request.max_content_length = app.config[config_key]
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+@app.errorhandler(ServiceUnavailable)
+def service_unavailable(e):
+    headers = {'Retry-After': str(e.retry_after)} if e.retry_after else {}
+    if request.path.startswith('/api/'):
+        return jsonify({"error": e.description}), 503, headers
+    if request.endpoint == 'upload_resume':
+        flash("We're receiving a lot of applications right now. Please try again in a few seconds.", "error")
+        return render_template('apply.html'), 503, headers
+    return e
+
 # --- Routes ---
 
 @app.route('/')
@@ -31,7 +100,7 @@ def apply():
     
 @app.route('/thank_you')
 def thank_you():
-    return render_template('thank_you.html')
+    return render_template('thank_you.html', job_id=request.args.get('job_id', type=int))
 
 # --- NEW: Login and Logout Routes ---
 @app.route('/login', methods=['GET', 'POST'])
@@ -40,13 +109,7 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        conn = sqlite3.connect('ats.db')
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, password))
-        user = cursor.fetchone()
-        conn.close()
+        user = query("SELECT * FROM users WHERE username = ? AND password = ?", (username, password), one=True)
         
         if user:
             session['user_id'] = user['id']
@@ -69,22 +132,36 @@ def logout():
 def hr_dashboard():
     return redirect(url_for('show_candidates'))
 
+def _candidate_query_args(default_columns):
+    """Reads pagination, filter and sort options for list_candidates from the query string."""
+    fields = request.args.get('fields')
+    return dict(
+        columns=fields.split(',') if fields else default_columns,
+        sort=request.args.get('sort', DEFAULT_SORT),
+        cursor=request.args.get('cursor') or None,
+        limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+        status=[status for status in request.args.getlist('status') if status],
+        skills=[skill.strip() for skill in request.args.get('skills', '').split(',') if skill.strip()],
+        min_experience=request.args.get('min_experience', type=float),
+        max_experience=request.args.get('max_experience', type=float),
+        aptitude_result=request.args.get('aptitude_result') or None,
+    )
+
 @app.route('/candidates')
 @login_required
 def show_candidates():
-    conn = sqlite3.connect('ats.db')
-    conn.row_factory = sqlite3.Row 
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT c.*, i.id as interview_id 
-        FROM candidates c
-        LEFT JOIN interviews i ON c.id = i.candidate_id
-        GROUP BY c.id
-        ORDER BY c.id DESC
-    """)
-    candidates = cursor.fetchall()
-    conn.close()
-    return render_template('candidates.html', candidates=candidates)
+    conn = get_db()
+    try:
+        page = list_candidates(conn, **_candidate_query_args(LIST_COLUMNS))
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for('show_candidates'))
+    revision = current_revision(conn)
+    latest_id = query("SELECT MAX(id) FROM candidates", one=True)[0]
+    # Query string without the cursor, for building the next-page link
+    filters = {key: values for key, values in request.args.lists() if key != 'cursor'}
+    return render_template('candidates.html', candidates=page['candidates'], next_cursor=page['next_cursor'],
+                           filters=filters, sorts=SORTS, revision=revision, latest_id=latest_id or 0)
 
 @app.route('/upload_results', methods=['POST'])
 @login_required
@@ -97,24 +174,20 @@ def upload_results():
     if not file.filename.endswith('.csv'):
         flash("Invalid file type. Please upload a CSV file.", "error")
         return redirect(url_for('show_candidates'))
-    PASSING_SCORE = 70
-    stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-    csv_reader = csv.DictReader(stream)
-    conn = sqlite3.connect('ats.db')
-    cursor = conn.cursor()
-    for row in csv_reader:
-        email = row['email']
-        score = int(row['score'])
-        result = 'Cleared' if score >= PASSING_SCORE else 'Not Cleared'
-        new_status = 'Test Cleared' if result == 'Cleared' else 'Test Failed'
-        cursor.execute("""
-            UPDATE candidates 
-            SET aptitude_score = ?, aptitude_result = ?, status = ?
-            WHERE email = ?
-        """, (score, result, new_status, email))
-    conn.commit()
-    conn.close()
-    flash("Test results uploaded and statuses updated successfully.", "success")
+    # Decode as the file streams in rather than reading it all into memory first
+    stream = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+    try:
+        summary = apply_results(get_db(), stream, app.config['PASSING_SCORE'])
+    except ResultsFileError as e:
+        flash(str(e), "error")
+        return redirect(url_for('show_candidates'))
+    message = (f"Test results uploaded: {summary['updated']} candidate(s) updated, "
+               f"{summary['unmatched']} unmatched, {summary['malformed']} malformed row(s).")
+    if summary['unmatched_sample']:
+        message += f" Unmatched emails include: {', '.join(summary['unmatched_sample'])}."
+    if summary['malformed_lines']:
+        message += f" Malformed lines include: {', '.join(map(str, summary['malformed_lines']))}."
+    flash(message, "success")
     return redirect(url_for('show_candidates'))
     
 @app.route('/update_status/<int:candidate_id>', methods=['POST'])
@@ -122,25 +195,21 @@ def upload_results():
 def update_status(candidate_id):
     # ... (function body remains the same)
     new_status = request.form['status']
-    conn = sqlite3.connect('ats.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, email FROM candidates WHERE id = ?", (candidate_id,))
-    candidate = cursor.fetchone()
+    cursor = get_db().cursor()
+    candidate = query("SELECT name, email FROM candidates WHERE id = ?", (candidate_id,), one=True)
     if candidate:
         candidate_email = candidate['email']
         candidate_name = candidate['name']
         cursor.execute("UPDATE candidates SET status = ? WHERE id = ?", (new_status, candidate_id))
-        conn.commit()
         if new_status == 'Shortlisted':
             subject = "Next Steps in Your Application"
             body = "Hello,\n\nThank you for your interest. We are pleased to inform you that you have been shortlisted for the next round.\n\nPlease complete the aptitude test at the following link: [Insert Test Link Here]\n\nBest regards,\nHR Team"
-            send_email(candidate_email, subject, body)
+            queue_email(cursor, candidate_email, subject, body)
         elif new_status == 'Hired':
             subject = f"Congratulations! Offer of Employment"
             body = f"Dear {candidate_name},\n\nFollowing your recent interviews, we are delighted to offer you the position.\n\nWe were very impressed with your skills and experience and believe you will be a great asset to our team. A formal offer letter with details on your role, compensation, and start date will be sent shortly.\n\nWelcome aboard!\n\nBest regards,\nHR Team"
-            send_email(candidate_email, subject, body)
-    conn.close()
+            queue_email(cursor, candidate_email, subject, body)
+        commit()
     flash(f"Candidate status updated to '{new_status}'.", "success")
     return redirect(url_for('show_candidates'))
 
@@ -148,12 +217,9 @@ def update_status(candidate_id):
 @login_required
 def delete_candidate(candidate_id):
     # ... (function body remains the same)
-    conn = sqlite3.connect('ats.db')
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM interviews WHERE candidate_id = ?", (candidate_id,))
-    cursor.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
-    conn.commit()
-    conn.close()
+    execute("DELETE FROM interviews WHERE candidate_id = ?", (candidate_id,))
+    execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+    commit()
     flash(f"Candidate #{candidate_id} has been deleted.", "success")
     return redirect(url_for('show_candidates'))
 
@@ -161,12 +227,7 @@ def delete_candidate(candidate_id):
 @login_required
 def schedule_form(candidate_id):
     # ... (function body remains the same)
-    conn = sqlite3.connect('ats.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM candidates WHERE id = ?", (candidate_id,))
-    candidate = cursor.fetchone()
-    conn.close()
+    candidate = query("SELECT name FROM candidates WHERE id = ?", (candidate_id,), one=True)
     return render_template('schedule_form.html', candidate=candidate, candidate_id=candidate_id)
 
 @app.route('/schedule_interview/<int:candidate_id>', methods=['POST'])
@@ -177,11 +238,8 @@ def schedule_interview(candidate_id):
     interview_date = request.form['date']
     interview_time = request.form['time']
     interviewer_email = 'interviewer@example.com' 
-    conn = sqlite3.connect('ats.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, email FROM candidates WHERE id = ?", (candidate_id,))
-    candidate = cursor.fetchone()
+    cursor = get_db().cursor()
+    candidate = query("SELECT name, email FROM candidates WHERE id = ?", (candidate_id,), one=True)
     candidate_name = candidate['name']
     candidate_email = candidate['email']
     cursor.execute("""
@@ -189,14 +247,13 @@ def schedule_interview(candidate_id):
         VALUES (?, ?, ?, ?)
     """, (candidate_id, interviewer_name, interview_date, interview_time))
     cursor.execute("UPDATE candidates SET status = ? WHERE id = ?", ('Interview Scheduled', candidate_id))
-    conn.commit()
-    conn.close()
     candidate_subject = "Interview Scheduled"
     candidate_body = f"Hello {candidate_name},\n\nThis is to confirm that your interview has been scheduled with {interviewer_name} on {interview_date} at {interview_time}.\n\nBest regards,\nHR Team"
-    send_email(candidate_email, candidate_subject, candidate_body)
+    queue_email(cursor, candidate_email, candidate_subject, candidate_body)
     interviewer_subject = f"Interview Scheduled with {candidate_name}"
     interviewer_body = f"Hello {interviewer_name},\n\nYou are scheduled to interview the candidate, {candidate_name}, on {interview_date} at {interview_time}.\n\nPlease be prepared.\n\nBest regards,\nATS System"
-    send_email(interviewer_email, interviewer_subject, interviewer_body)
+    queue_email(cursor, interviewer_email, interviewer_subject, interviewer_body)
+    commit()
     flash(f"Interview scheduled for {candidate_name}.", "success")
     return redirect(url_for('show_candidates'))
 
@@ -204,12 +261,7 @@ def schedule_interview(candidate_id):
 @login_required
 def feedback_form(candidate_id):
     # ... (function body remains the same)
-    conn = sqlite3.connect('ats.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM candidates WHERE id = ?", (candidate_id,))
-    candidate = cursor.fetchone()
-    conn.close()
+    candidate = query("SELECT name FROM candidates WHERE id = ?", (candidate_id,), one=True)
     return render_template('feedback_form.html', candidate=candidate, candidate_id=candidate_id)
 
 @app.route('/submit_feedback/<int:candidate_id>', methods=['POST'])
@@ -218,23 +270,20 @@ def submit_feedback(candidate_id):
     # ... (function body remains the same)
     comments = request.form['comments']
     interview_result = request.form['result']
-    conn = sqlite3.connect('ats.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM interviews WHERE candidate_id = ?", (candidate_id,))
-    interview = cursor.fetchone()
+    interview = query("SELECT id FROM interviews WHERE candidate_id = ?", (candidate_id,), one=True)
     if not interview:
-        cursor.execute("INSERT INTO interviews (candidate_id) VALUES (?)", (candidate_id,))
-        conn.commit()
-    cursor.execute("UPDATE interviews SET comments = ? WHERE candidate_id = ?", (comments, candidate_id))
+        execute("INSERT INTO interviews (candidate_id) VALUES (?)", (candidate_id,))
+    execute("UPDATE interviews SET comments = ? WHERE candidate_id = ?", (comments, candidate_id))
     new_status = 'Interview Cleared' if interview_result == 'Cleared' else 'Interview Failed'
-    cursor.execute("UPDATE candidates SET status = ? WHERE id = ?", (new_status, candidate_id))
-    conn.commit()
-    conn.close()
+    execute("UPDATE candidates SET status = ? WHERE id = ?", (new_status, candidate_id))
+    commit()
     flash("Interview feedback submitted successfully.", "success")
     return redirect(url_for('show_candidates'))
 
 # --- Unprotected Public Routes ---
 @app.route('/upload', methods=['POST'])
+@max_content_length('UPLOAD_MAX_CONTENT_LENGTH')
+@limit_concurrency('UPLOAD_CONCURRENCY')
 def upload_resume():
     # ... (function body remains the same)
     if 'resume' not in request.files or request.files['resume'].filename == '':
@@ -244,56 +293,210 @@ def upload_resume():
     candidate_name_form = request.form['name']
     candidate_email_form = request.form['email']
     if file:
-        filepath = os.path.join("./temp_resumes", file.filename)
-        file.save(filepath)
-        parser = ResumeParser()
-        resume_text = parser.extract_text_from_pdf(filepath)
-        parsed_data = parser.parse(resume_text)
-        conn = sqlite3.connect('ats.db')
-        cursor = conn.cursor()
+        # Parsing happens in the job workers; the upload goes straight from
+        # memory into the job row, without a temp file
+        with metrics.stage("upload_read"):
+            payload = file.stream.read(MAX_PDF_BYTES + 1)
+        if len(payload) > MAX_PDF_BYTES:
+            flash(f"Resume files must be under {MAX_PDF_BYTES // (1024 * 1024)} MB.", "error")
+            return redirect(url_for('apply'))
+        cursor = get_db().cursor()
         try:
-            cursor.execute('''
-            INSERT INTO candidates (name, email, phone, education_qualifications, total_experience_years, skills, experience_summary, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, 'Applied')
-            ''', (
-                candidate_name_form,
-                candidate_email_form,
-                parsed_data.get('phone'),
-                ', '.join(parsed_data.get('education_qualifications', [])),
-                parsed_data.get('total_experience_years'),
-                ', '.join(parsed_data.get('skills', [])),
-                '\n'.join(parsed_data.get('experience_summary', []))
-            ))
-            conn.commit()
-            subject = "Application Received"
-            body = f"Hello {candidate_name_form},\n\nThank you for applying. We have successfully received your resume.\n\nOur team will review your application and contact you if your qualifications meet our needs.\n\nBest regards,\nHR Team"
-            send_email(candidate_email_form, subject, body)
-            return redirect(url_for('thank_you'))
+            with metrics.stage("db_write"):
+                cursor.execute('''
+                INSERT INTO candidates (name, email, status)
+                VALUES (?, ?, 'Processing')
+                ''', (candidate_name_form, candidate_email_form))
+                job_id = enqueue(cursor, cursor.lastrowid, secure_filename(file.filename), payload)
+                commit()
+            # Applicants may only look up jobs submitted from their own session
+            session['job_ids'] = (session.get('job_ids', []) + [job_id])[-SESSION_JOBS:]
+            return redirect(url_for('thank_you', job_id=job_id))
         except sqlite3.IntegrityError:
             flash(f"A candidate with the email '{candidate_email_form}' already exists.", "error")
             return redirect(url_for('apply'))
-        finally:
-            conn.close()
-            os.remove(filepath)
+
+@app.route('/api/jobs/<int:job_id>')
+def job_status(job_id):
+    """Status of a resume job, for HR or for the session that uploaded it."""
+    # Someone else's job looks the same as a missing one, so ids can't be probed
+    if 'user_id' not in session and job_id not in session.get('job_ids', []):
+        return jsonify({"error": "Job not found"}), 404
+    job = get_job(get_db(), job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(dict(job))
+
+@app.route('/api/cache/stats')
+@login_required
+def cache_stats():
+    return jsonify(parse_cache.stats(get_db()))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: stage timings, request metrics and queue gauges."""
+    conn = get_db()
+    gauges = {
+        'ats_parser_load_seconds': [({'model': model}, seconds) for model, seconds in parser_load_times().items()],
+        'ats_resume_jobs': [({'status': row[0]}, row[1]) for row in
+                            conn.execute("SELECT status, COUNT(*) FROM resume_jobs GROUP BY status")],
+        'ats_email_outbox': [({'status': row[0]}, row[1]) for row in
+                             conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")],
+    }
+    cache = parse_cache.stats(conn)
+    gauges['ats_parse_cache_entries'] = [({}, cache['entries'])]
+    gauges['ats_parse_cache_hit_rate'] = [({}, cache['hit_rate'])]
+    limits = concurrency_snapshot()
+    gauges['ats_concurrency_limit'] = [({'endpoint': endpoint}, limit) for endpoint, limit, _ in limits]
+    gauges['ats_concurrency_in_flight'] = [({'endpoint': endpoint}, in_flight) for endpoint, _, in_flight in limits]
+    return app.response_class(metrics.render(conn, gauges), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/candidates')
+@limit_concurrency('API_CONCURRENCY')
 def api_candidates():
-    # ... (function body remains the same)
-    conn = sqlite3.connect('ats.db')
-    conn.row_factory = sqlite3.Row 
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT c.*, i.id as interview_id 
-        FROM candidates c
-        LEFT JOIN interviews i ON c.id = i.candidate_id
-        GROUP BY c.id
-        ORDER BY c.id ASC
-    """)
-    candidates = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(row) for row in candidates])
+    conn = get_db()
+    try:
+        # Any write bumps the revision, so an unchanged revision means an unchanged page
+        revision = current_revision(conn)
+        etag = f"{revision}-{hashlib.sha1(request.query_string).hexdigest()[:16]}"
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        page = list_candidates(conn, **_candidate_query_args(LIST_COLUMNS))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response = jsonify({**page, "revision": revision})
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/candidates/search')
+@login_required
+def api_candidate_search():
+    text = request.args.get('q', '')
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    prefix = request.args.get('prefix', '1') != '0'
+    return jsonify({"results": search_candidates(get_db(), text, limit, prefix)})
+
+@app.route('/api/candidates/match')
+@login_required
+def api_candidate_match():
+    """Candidates with all of ?all=, at least one of ?any= (comma separated) and experience in range."""
+    def skill_list(name):
+        return [skill.strip() for skill in request.args.get(name, '').split(',') if skill.strip()]
+
+    results = find_candidates(
+        get_db(),
+        all_skills=skill_list('all'),
+        any_skills=skill_list('any'),
+        min_experience=request.args.get('min_experience', type=float),
+        max_experience=request.args.get('max_experience', type=float),
+        limit=request.args.get('limit', DEFAULT_MATCH_LIMIT, type=int),
+    )
+    return jsonify({"results": results})
+
+# Built on the first ranking, then kept in step with the change feed before each one.
+# ranking pulls in NumPy and SciPy, so it is only imported then.
+_ranking_index = None
+_ranking_lock = threading.Lock()
+
+def _get_ranking_index():
+    global _ranking_index
+    with _ranking_lock:
+        if _ranking_index is None:
+            from ranking import RankingIndex
+            _ranking_index = RankingIndex()
+    return _ranking_index
+
+@app.route('/api/rank', methods=['POST'])
+@login_required
+def api_rank():
+    """Ranks every candidate against a job description and returns the top k."""
+    from ranking import DEFAULT_TOP_K
+
+    data = request.get_json(silent=True) or request.form
+    job_description = (data.get('job_description') or '').strip()
+    if not job_description:
+        return jsonify({"error": "job_description is required"}), 400
+    try:
+        k = int(data.get('k', DEFAULT_TOP_K))
+        min_experience = data.get('min_experience')
+        min_experience = float(min_experience) if min_experience not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "k and min_experience must be numbers"}), 400
+    skills = data.get('skills')
+    if isinstance(skills, str):
+        skills = [skill.strip() for skill in skills.split(',') if skill.strip()]
+
+    ranking_index = _get_ranking_index()
+    ranking_index.sync(get_db())
+    unknown_skills = []
+    if skills is not None:
+        skills, unknown_skills = ranking_index.resolve_skills(skills)
+    ranked = ranking_index.top_k(job_description, k, required_skills=skills, min_experience=min_experience)
+    if ranked:
+        ids = [result['id'] for result in ranked]
+        details = {row['id']: row for row in query(
+            f"SELECT id, name, email, status, total_experience_years, skills FROM candidates WHERE id IN ({', '.join('?' * len(ids))})",
+            ids)}
+        ranked = [{**dict(details[result['id']]), **result} for result in ranked if result['id'] in details]
+    return jsonify({"results": ranked, "unknown_skills": unknown_skills})
+
+@app.route('/api/candidates/changes')
+def api_candidate_changes():
+    since = request.args.get('since', 0, type=int)
+    limit = min(request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int), DEFAULT_CHANGES_LIMIT)
+    changes = changes_since(get_db(), since, limit)
+    if changes is None:
+        return jsonify({"error": "Cursor is too old, reload /api/candidates"}), 410
+    return jsonify(changes)
+
+@app.route('/api/candidates/stream')
+@limit_concurrency('STREAM_CONCURRENCY')
+def api_candidate_stream():
+    """Server-Sent Events: pushes the change feed as it grows, so dashboards don't have to poll."""
+    since = request.headers.get('Last-Event-ID', type=int) or request.args.get('since', 0, type=int)
+    database = app.config['DATABASE']
+    max_seconds = app.config['SSE_MAX_SECONDS']
+
+    def events(since):
+        # Runs after the request context is gone, so it holds its own connection
+        conn = db.connect(database)
+        try:
+            yield f"retry: {SSE_POLL_INTERVAL * 1000}\n\n"
+            idle = 0
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                if current_revision(conn) > since:
+                    changes = changes_since(conn, since)
+                    if changes is None:
+                        yield "event: resync\ndata: {}\n\n"
+                        return
+                    since = changes['cursor']
+                    yield f"id: {since}\nevent: changes\ndata: {json.dumps(changes)}\n\n"
+                    idle = 0
+                else:
+                    idle += 1
+                    if idle * SSE_POLL_INTERVAL >= 15:
+                        yield ": keep-alive\n\n"
+                        idle = 0
+                    time.sleep(SSE_POLL_INTERVAL)
+        finally:
+            conn.close()
+
+    return app.response_class(events(since), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
-    if not os.path.exists("./temp_resumes"):
-        os.makedirs("./temp_resumes")
-    app.run(debug=True)
\ No newline at end of file
+    # Development server. In production run `python serve.py` (gunicorn, see gunicorn.conf.py).
+    debug = os.environ.get('ATS_DEBUG', '0') == '1'
+    _conn = db.connect(app.config['DATABASE'])
+    create_schema(_conn)
+    _conn.close()
+    # With the reloader, only start background work in its child, not in the watcher process
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        if app.config['JOB_WORKERS']:
+            start_workers(app.config['JOB_WORKERS'], app.config['DATABASE'])
+        if app.config['OUTBOX_SENDER']:
+            start_outbox_sender(app.config['DATABASE'])
+    app.run(debug=debug, threaded=True)
@@ -0,0 +1,88 @@
+import csv
+import sqlite3
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+
+CHUNK_SIZE = 1000
+# How many unmatched emails / malformed line numbers to echo back
+SAMPLE_SIZE = 10
+
+class ResultsFileError(ValueError):
+    """The uploaded file can't be read as an aptitude results CSV."""
+
+def _valid_rows(reader: csv.DictReader, malformed: List[int], counts: Dict[str, int]) -> Iterator[Tuple[str, int]]:
+    for row in reader:
+        counts['rows'] += 1
+        email = (row.get('email') or '').strip()
+        try:
+            score = int((row.get('score') or '').strip())
+        except ValueError:
+            score = None
+        if not email or score is None:
+            counts['malformed'] += 1
+            if len(malformed) < SAMPLE_SIZE:
+                malformed.append(reader.line_num)
+            continue
+        yield email, score
+
+def _chunks(rows: Iterable, size: int) -> Iterator[List]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def apply_results(conn: sqlite3.Connection, stream: TextIO, passing_score: int,
+                  chunk_size: int = CHUNK_SIZE) -> Dict:
+    """Streams a CSV with `email` and `score` columns into a temp table in chunks,
+    then applies every score with one set-based UPDATE, all in a single transaction.
+
+    Returns counts of rows read, updated, unmatched and malformed, with samples.
+    Raises ResultsFileError if the header lacks the required columns or the file isn't UTF-8."""
+    reader = csv.DictReader(stream)
+    try:
+        fieldnames = reader.fieldnames or []
+        if 'email' not in fieldnames or 'score' not in fieldnames:
+            raise ResultsFileError("The CSV file must have 'email' and 'score' columns.")
+
+        # Temp tables outlive the request on pooled connections, so start empty
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS aptitude_upload (email TEXT PRIMARY KEY, score INTEGER NOT NULL)")
+        conn.execute("DELETE FROM aptitude_upload")
+        counts = {'rows': 0, 'malformed': 0}
+        malformed: List[int] = []
+        for chunk in _chunks(_valid_rows(reader, malformed, counts), chunk_size):
+            # A repeated email keeps its last score, as the row-by-row version did
+            conn.executemany("INSERT OR REPLACE INTO aptitude_upload (email, score) VALUES (?, ?)", chunk)
+
+        updated = conn.execute("""
+            UPDATE candidates
+            SET aptitude_score = u.score,
+                aptitude_result = CASE WHEN u.score >= :passing THEN 'Cleared' ELSE 'Not Cleared' END,
+                status = CASE WHEN u.score >= :passing THEN 'Test Cleared' ELSE 'Test Failed' END
+            FROM aptitude_upload u
+            WHERE candidates.email = u.email
+        """, {'passing': passing_score}).rowcount
+        unmatched_query = """
+            FROM aptitude_upload u
+            WHERE NOT EXISTS (SELECT 1 FROM candidates c WHERE c.email = u.email)
+        """
+        unmatched = conn.execute("SELECT COUNT(*) " + unmatched_query).fetchone()[0]
+        unmatched_sample = [row[0] for row in conn.execute(f"SELECT u.email {unmatched_query} LIMIT {SAMPLE_SIZE}")]
+        conn.execute("DELETE FROM aptitude_upload")
+        conn.commit()
+    except UnicodeDecodeError:
+        conn.rollback()
+        raise ResultsFileError("The CSV file must be UTF-8 encoded.")
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        'rows': counts['rows'],
+        'updated': updated,
+        'unmatched': unmatched,
+        'malformed': counts['malformed'],
+        'unmatched_sample': unmatched_sample,
+        'malformed_lines': malformed,
+    }
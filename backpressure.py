@@ -0,0 +1,77 @@
+import os
+import threading
+from functools import wraps
+from typing import Dict, List, Tuple
+
+from flask import current_app, request
+from werkzeug.exceptions import ServiceUnavailable
+
+# Seconds a request may wait for a free slot before it is turned away
+QUEUE_TIMEOUT = float(os.environ.get('ATS_QUEUE_TIMEOUT', '0.5'))
+# Seconds clients are told to wait (Retry-After) when a route is full
+RETRY_AFTER = int(os.environ.get('ATS_RETRY_AFTER', '5'))
+
+class ConcurrencyLimit:
+    """At most `limit` requests inside a route at once, in this process."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+_limits: Dict[str, ConcurrencyLimit] = {}
+_limits_lock = threading.Lock()
+
+def _limit_for(endpoint: str, config_key: str) -> ConcurrencyLimit:
+    limit = _limits.get(endpoint)
+    if limit is None:
+        with _limits_lock:
+            limit = _limits.get(endpoint)
+            if limit is None:
+                limit = _limits[endpoint] = ConcurrencyLimit(current_app.config[config_key])
+    return limit
+
+def limit_concurrency(config_key: str):
+    """Lets at most app.config[config_key] requests run the view at once. A request that
+    can't get a slot within QUEUE_TIMEOUT gets a 503 with Retry-After instead of queuing
+    behind the others. A streamed response keeps its slot until it is closed, since it
+    holds a server thread for that long. A limit of 0 turns it off."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config.get(config_key):
+                return f(*args, **kwargs)
+            limit = _limit_for(request.endpoint, config_key)
+            if not limit.acquire(QUEUE_TIMEOUT):
+                raise ServiceUnavailable("Too many requests are being handled right now; please retry shortly.",
+                                         retry_after=RETRY_AFTER)
+            try:
+                response = current_app.make_response(f(*args, **kwargs))
+            except BaseException:
+                limit.release()
+                raise
+            if response.is_streamed:
+                response.call_on_close(limit.release)
+            else:
+                limit.release()
+            return response
+        return decorated_function
+    return decorator
+
+def snapshot() -> List[Tuple[str, int, int]]:
+    """(endpoint, limit, in flight) for every limited route that has been hit."""
+    with _limits_lock:
+        return [(endpoint, limit.limit, limit.in_flight) for endpoint, limit in sorted(_limits.items())]
@@ -0,0 +1,104 @@
+"""calculate_total_experience on long multi-role resumes: the previous
+strptime-per-match implementation against the current one.
+
+Usage: python benchmarks/bench_experience.py [--resumes N] [--roles N] [--repeat N] [--json]
+Resumes come from benchmarks/corpus.py with their experience sections repeated
+until each has --roles dated roles. The old code only understood "Mon YYYY"
+ranges and summed them, so the two disagree on years wherever roles overlap or
+use MM/YYYY, YYYY or "to date"; the report counts those resumes.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+
+def legacy_total_experience(text: str) -> float:
+    """calculate_total_experience as it was before precompiled patterns and interval merging."""
+    date_pattern = re.compile(
+        r'(\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?,?\s+\d{4})\s*-\s*(\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?,?\s+\d{4}|\bPresent\b)',
+        re.IGNORECASE
+    )
+    total_months = 0
+    for start_date_str, end_date_str in date_pattern.findall(text):
+        try:
+            start_date = datetime.strptime(start_date_str.replace('.', '').replace(',', ''), '%b %Y')
+            if 'Present' in end_date_str:
+                end_date = datetime.now()
+            else:
+                end_date = datetime.strptime(end_date_str.replace('.', '').replace(',', ''), '%b %Y')
+            if start_date < end_date:
+                total_months += (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
+        except ValueError:
+            continue
+    return round(total_months / 12, 1)
+
+def long_resume(index: int, roles: int, seed: int) -> str:
+    """Resume `index` with roles borrowed from the following resumes until it has `roles` of them."""
+    lines = corpus.resume_lines(index, seed)
+    experience, borrowed = [], 1
+    while sum(1 for line in experience if not line.startswith("- ")) < roles:
+        other = corpus.resume_lines(index + borrowed * 7919, seed)
+        start, end = other.index("Experience") + 1, other.index("Skills") - 1
+        experience += [line for line in other[start:end] if line and line != "Projects" and not line.startswith("Project ")]
+        borrowed += 1
+    at = lines.index("Experience") + 1
+    return "\n".join(lines[:at] + experience + lines[at:])
+
+def time_per_call(fn, texts, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        samples.append((time.perf_counter() - start) / len(texts) * 1e6)
+    return statistics.median(samples)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=200)
+    arg_parser.add_argument("--roles", type=int, default=40, help="dated roles per resume")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeat", type=int, default=7)
+    arg_parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = arg_parser.parse_args()
+
+    # The method only uses the taxonomy, so skip loading a spaCy model
+    from resume_parser import ResumeParser
+    from skill_matcher import load_taxonomy
+    parser = ResumeParser.__new__(ResumeParser)
+    parser.taxonomy = load_taxonomy()
+
+    texts = [long_resume(i, args.roles, args.seed) for i in range(args.resumes)]
+    cases = {"legacy (strptime, sum)": legacy_total_experience,
+             "current (precompiled, union)": parser.calculate_total_experience}
+    report = {"resumes": len(texts), "roles_per_resume": args.roles,
+              "mean_chars": round(statistics.mean(len(text) for text in texts)), "us_per_call": {}}
+    for name, fn in cases.items():
+        fn(texts[0])  # warm up
+        report["us_per_call"][name] = round(time_per_call(fn, texts, args.repeat), 1)
+    legacy_us, current_us = report["us_per_call"].values()
+    report["speedup"] = round(legacy_us / current_us, 2) if current_us else None
+    report["resumes_with_different_years"] = sum(
+        legacy_total_experience(text) != parser.calculate_total_experience(text) for text in texts)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['resumes']} resumes, {args.roles} roles each, {report['mean_chars']} chars on average")
+    for name, us in report["us_per_call"].items():
+        print(f"{name:<32} {us:>10.1f} us/call")
+    print(f"{'speedup':<32} {report['speedup']:>10.2f}x")
+    print(f"{'resumes with different years':<32} {report['resumes_with_different_years']:>10}")
+
+if __name__ == "__main__":
+    main()
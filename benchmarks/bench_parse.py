@@ -0,0 +1,66 @@
+"""Per-resume parse latency: the old double spaCy pass vs. single-pass vs. the lean pipeline.
+
+Usage: python benchmarks/bench_parse.py [resume.pdf ...] [--repeat N]
+Without PDFs a built-in sample resume is used.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume_parser import ResumeParser
+
+SAMPLE_RESUME = """Jane Doe
+jane.doe@example.com | +1 555-123-4567
+Education
+B.Tech in Computer Science, 2014. M.Tech in Data Science, 2016.
+Experience
+Senior Software Engineer, Acme Corp, Jan 2019 - Present. Worked on Python and Flask services deployed on AWS with Docker and Kubernetes.
+Software Engineer, Initech, Jul 2016 - Dec 2018. Role included building React front-ends and PostgreSQL reporting.
+Internship, Globex, May 2015 - Aug 2015. Project on machine learning with TensorFlow and Pandas.
+Skills
+Python, Java, SQL, Git, Agile, Scrum, Communication, Project Management
+"""
+
+def legacy_parse(parser: ResumeParser, text: str) -> dict:
+    """parse() as it was before: the resume goes through the full pipeline twice."""
+    result = parser.parse(text)
+    parser.nlp(text)
+    return result
+
+def time_per_resume(fn, texts, repeat):
+    samples = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            fn(text)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("pdfs", nargs="*")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    full = ResumeParser()
+    lean = ResumeParser(lean=True)
+    texts = [full.extract_text_from_pdf(path) for path in args.pdfs] or [SAMPLE_RESUME * 3]
+
+    cases = [
+        ("double pass (before)", lambda text: legacy_parse(full, text)),
+        ("single pass", full.parse),
+        ("single pass, lean pipeline", lean.parse),
+    ]
+    print(f"{'mode':<28} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, fn in cases:
+        fn(texts[0])  # warm up
+        samples = sorted(time_per_resume(fn, texts, args.repeat))
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{name:<28} {statistics.mean(samples):>9.2f} {statistics.median(samples):>9.2f} {p95:>9.2f}")
+
+if __name__ == "__main__":
+    main()
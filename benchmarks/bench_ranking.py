@@ -0,0 +1,92 @@
+"""Ranking latency at scale: building the index, scoring a job description against
+every candidate, and absorbing new candidates incrementally.
+
+Usage: python benchmarks/bench_ranking.py [--candidates N] [--queries N] [--seed N]
+Candidates are synthetic, drawn from the skills taxonomy and a small vocabulary.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking import RankingIndex, tokenize
+from skill_matcher import load_taxonomy
+
+WORDS = """developed designed built led migrated maintained optimised automated deployed tested
+    services pipelines dashboards platform api backend frontend microservices analytics reporting
+    payments search infrastructure monitoring models data cloud mobile web latency throughput
+    customers clients stakeholders product engineers features releases performance security""".split()
+
+JOB_DESCRIPTIONS = [
+    "Senior Python engineer, 5+ years, building backend services and data pipelines with Flask, Docker and AWS.",
+    "Frontend developer with React and JavaScript, 3 years building web dashboards and analytics features.",
+    "Data scientist: machine learning models, TensorFlow, Pandas, SQL reporting; 4 years minimum.",
+    "DevOps engineer for cloud infrastructure and monitoring, Kubernetes and Docker, 6+ years.",
+]
+
+def synthetic_candidates(count, skills, rng):
+    for candidate_id in range(1, count + 1):
+        summary = [' '.join(rng.choices(WORDS, k=12)) + ' with ' + rng.choice(skills) for _ in range(rng.randint(1, 4))]
+        yield (candidate_id, rng.sample(skills, rng.randint(2, 8)),
+               round(rng.uniform(0, 15), 1) if rng.random() > 0.1 else None, summary)
+
+def naive_top_k(candidates, job_description, k):
+    """Scores one candidate at a time in Python: skill overlap plus term overlap."""
+    wanted = {skill.lower() for skill in load_taxonomy().skills.find(job_description)}
+    terms = set(tokenize(job_description))
+    scored = []
+    for candidate_id, skills, _, summary in candidates:
+        overlap = len(wanted & {skill.lower() for skill in skills}) / max(len(wanted), 1)
+        words = set(tokenize('\n'.join(summary)))
+        scored.append((0.6 * overlap + 0.3 * len(terms & words) / max(len(terms), 1), candidate_id))
+    return sorted(scored, reverse=True)[:k]
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--candidates", type=int, default=100000)
+    arg_parser.add_argument("--queries", type=int, default=20)
+    arg_parser.add_argument("--seed", type=int, default=7)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    matcher = load_taxonomy().skills
+    skills = sorted(set(matcher.exact.values()) | set(matcher.folded.values()))
+    candidates = list(synthetic_candidates(args.candidates, skills, rng))
+
+    index = RankingIndex()
+    _, add_ms = timed(lambda: [index.add(*candidate) for candidate in candidates])
+    _, flush_ms = timed(lambda: index.top_k(JOB_DESCRIPTIONS[0], 10))
+    print(f"{len(index)} candidates: add {add_ms:.0f} ms, first query incl. matrix build {flush_ms:.0f} ms")
+    print(f"skills matrix {index.skills.shape} nnz={index.skills.nnz}, terms matrix {index.tf.shape} nnz={index.tf.nnz}")
+
+    samples = []
+    for i in range(args.queries):
+        _, ms = timed(lambda: index.top_k(JOB_DESCRIPTIONS[i % len(JOB_DESCRIPTIONS)], 20))
+        samples.append(ms)
+    samples.sort()
+    print(f"{'top-20 query':<34} mean {statistics.mean(samples):8.2f} ms  p50 {statistics.median(samples):8.2f} ms"
+          f"  p95 {samples[int(len(samples) * 0.95) - 1]:8.2f} ms")
+
+    fresh = list(synthetic_candidates(1000, skills, rng))
+    fresh = [(args.candidates + candidate_id, *rest) for candidate_id, *rest in fresh]
+    _, ms = timed(lambda: [index.add(*candidate) for candidate in fresh] and index.top_k(JOB_DESCRIPTIONS[1], 20))
+    print(f"{'append 1,000 + query':<34} {ms:8.2f} ms")
+    _, ms = timed(lambda: [index.add(*candidate) for candidate in candidates[:1000]] and index.top_k(JOB_DESCRIPTIONS[2], 20))
+    print(f"{'replace 1,000 + query':<34} {ms:8.2f} ms")
+
+    subset = candidates[:min(len(candidates), 20000)]
+    _, ms = timed(lambda: naive_top_k(subset, JOB_DESCRIPTIONS[0], 20))
+    print(f"{'python loop (' + str(len(subset)) + ' candidates)':<34} {ms:8.2f} ms"
+          f"  (~{ms * len(candidates) / len(subset):.0f} ms at {len(candidates)})")
+
+if __name__ == "__main__":
+    main()
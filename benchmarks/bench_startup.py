@@ -0,0 +1,122 @@
+"""Startup cost: how long fresh processes take to import the app and serve a first
+request, and what preloading the model before forking saves job workers.
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--workers N] [--json]
+Each import case runs in a new interpreter; the fork cases compare workers that
+load the model themselves with workers forked from a parent that already has it.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CASES = {
+    "import resume_parser": "import resume_parser",
+    "import app": "import app",
+    "import app + GET /login": "import app; app.app.test_client().get('/login')",
+    "import app + GET /api/candidates": "import app; app.app.test_client().get('/api/candidates')",
+    "resume_parser.py CLI usage": None,
+    "load parser (get_parser)": "import resume_parser; resume_parser.get_parser()",
+}
+HEAVY_MODULES = ("spacy", "PyPDF2", "numpy", "scipy")
+
+def run_case(code, env):
+    command = [sys.executable, os.path.join(ROOT, "resume_parser.py")] if code is None else [sys.executable, "-c", code]
+    start = time.perf_counter()
+    subprocess.run(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+def heavy_modules_loaded(code, env):
+    probe = f"{code}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True)
+    return [module for module in output.stdout.strip().split(",") if module]
+
+def memory_kib():
+    """Pss and private memory of this process, from /proc (Linux only)."""
+    try:
+        with open("/proc/self/smaps_rollup") as smaps:
+            fields = dict(line.split(":", 1) for line in smaps if ":" in line)
+    except OSError:
+        return {}
+    return {key.lower(): int(fields[key].split()[0]) for key in ("Pss", "Private_Dirty") if key in fields}
+
+def _worker(started, results, release):
+    from resume_parser import get_parser
+    get_parser().parse("Jane Doe\njane@example.com\nEngineer, Jan 2020 - Present\nPython")
+    results.put({"ready_ms": (time.perf_counter() - started) * 1000, **memory_kib()})
+    release.wait()
+
+def fork_workers(count, preload):
+    """Forks `count` workers and reports how long each took to be ready to parse, and its memory."""
+    context = multiprocessing.get_context("fork")
+    results, release = context.Queue(), context.Event()
+    if preload:
+        import gc
+        from resume_parser import warm_up
+        warm_up()
+        gc.freeze()
+    started = time.perf_counter()
+    workers = [context.Process(target=_worker, args=(started, results, release)) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    reports = [results.get() for _ in workers]
+    release.set()
+    for worker in workers:
+        worker.join()
+    summary = {"all_ready_ms": round(max(report["ready_ms"] for report in reports), 1)}
+    for key in ("pss", "private_dirty"):
+        if all(key in report for report in reports):
+            summary[f"{key}_kib_per_worker"] = round(statistics.mean(report[key] for report in reports))
+    return summary
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--workers", type=int, default=4)
+    arg_parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = arg_parser.parse_args()
+
+    env = dict(os.environ, ATS_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="ats-startup-"), "startup.db"),
+               ATS_PRELOAD_PARSER="0")
+    subprocess.run([sys.executable, os.path.join(ROOT, "database_setup.py")], cwd=ROOT, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+    report = {"imports": {}, "fork": {}}
+    for name, code in CASES.items():
+        run_case(code, env)  # warm the OS file cache and .pyc files
+        samples = [run_case(code, env) for _ in range(args.repeat)]
+        report["imports"][name] = {
+            "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(min(samples), 1),
+            "heavy_modules": heavy_modules_loaded(code, env) if code else None,
+        }
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Each mode runs in a fresh interpreter so the first doesn't warm the second
+        for mode in ("load in each worker", "preload + fork"):
+            code = (f"import sys, json; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+                    f"import bench_startup; print(json.dumps(bench_startup.fork_workers({args.workers}, {mode != 'load in each worker'})))")
+            output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+            report["fork"][mode] = json.loads(output.stdout) if output.returncode == 0 else {"error": output.stderr[-500:]}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'fresh process':<36} {'median ms':>10} {'min ms':>9}  heavy modules imported")
+    for name, result in report["imports"].items():
+        heavy = ", ".join(result["heavy_modules"]) if result["heavy_modules"] else "-"
+        print(f"{name:<36} {result['median_ms']:>10.1f} {result['min_ms']:>9.1f}  {heavy}")
+    if report["fork"]:
+        print(f"\n{args.workers} forked job workers")
+        for mode, result in report["fork"].items():
+            print(f"{mode:<36} {json.dumps(result)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark suite: per-method parser timings and load tests of the Flask routes,
+reported as one JSON document so runs can be compared across commits.
+
+Usage: python benchmarks/bench_suite.py [--resumes N] [--requests N] [--concurrency N]
+                                        [--skip-parser] [--skip-routes] [--output FILE]
+Runs against a throwaway database built with database_setup.py; the synthetic
+corpus comes from benchmarks/corpus.py, so the same seed gives the same inputs.
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus
+
+def summarize(samples_ms: List[float]) -> Dict:
+    samples = sorted(samples_ms)
+    if not samples:
+        return {"count": 0}
+
+    def percentile(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "min_ms": round(samples[0], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+def time_calls(fn: Callable, inputs: List, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+# --- Parser micro-benchmarks ---
+
+def bench_parser(resumes: List[Dict], repeat: int, lean: bool) -> Dict:
+    from resume_parser import ResumeParser, get_parser
+
+    load_start = time.perf_counter()
+    parser = get_parser(lean=lean)
+    load_ms = (time.perf_counter() - load_start) * 1000
+    texts = [resume["text"] for resume in resumes]
+    docs = [parser.nlp(text) for text in texts]
+    pdfs = [resume["pdf"] for resume in resumes]
+
+    cases = {
+        "extract_text_from_pdf": (lambda pdf: ResumeParser.extract_text_from_pdf(io.BytesIO(pdf)), pdfs),
+        "nlp": (parser.nlp, texts),
+        "extract_name": (parser.extract_name, docs),
+        "extract_email": (parser.extract_email, texts),
+        "extract_phone": (parser.extract_phone, texts),
+        "extract_education": (parser.extract_education, texts),
+        "extract_skills": (parser.extract_skills, texts),
+        "calculate_total_experience": (parser.calculate_total_experience, texts),
+        "extract_experience": (parser.extract_experience, docs),
+        "parse": (parser.parse, texts),
+    }
+    results = {"model_load_ms": round(load_ms, 1), "methods": {}}
+    for name, (fn, inputs) in cases.items():
+        fn(inputs[0])  # warm up
+        results["methods"][name] = summarize(time_calls(fn, inputs, repeat))
+    return results
+
+# --- Route load tests ---
+
+class LoadRunner:
+    """Drives the app with test clients, one per thread, each logged in as HR."""
+
+    def __init__(self, app, concurrency: int):
+        self.app = app
+        self.concurrency = concurrency
+        self.local = threading.local()
+
+    def client(self):
+        if not hasattr(self.local, "client"):
+            self.local.client = self.app.test_client()
+            self.local.client.post("/login", data={"username": "hr", "password": "password"})
+        return self.local.client
+
+    def run(self, make_request: Callable, count: int) -> Dict:
+        def one(i):
+            start = time.perf_counter()
+            response = make_request(self.client(), i)
+            return (time.perf_counter() - start) * 1000, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            outcomes = list(executor.map(one, range(count)))
+        elapsed = time.perf_counter() - start
+        result = summarize([ms for ms, _ in outcomes])
+        result["requests_per_second"] = round(count / elapsed, 1) if elapsed else None
+        result["status_codes"] = dict(Counter(str(status) for _, status in outcomes))
+        return result
+
+def bench_routes(resumes: List[Dict], requests: int, concurrency: int, seed: int) -> Dict:
+    from app import app
+    import db
+    import job_queue
+
+    runner = LoadRunner(app, concurrency)
+    results = {}
+
+    def upload(client, i):
+        resume = resumes[i % len(resumes)]
+        return client.post("/upload", data={
+            "name": f"Bench Candidate {i}",
+            "email": f"bench{i}@example.com",
+            "resume": (io.BytesIO(resume["pdf"]), f"resume_{i}.pdf"),
+        })
+    results["POST /upload"] = runner.run(upload, requests)
+
+    # Parse the queued uploads in-process so the list routes have real data to page through
+    conn = db.connect(app.config["DATABASE"])
+    samples = []
+    while True:
+        job = job_queue.claim_job(conn)
+        if job is None:
+            break
+        start = time.perf_counter()
+        job_queue.process_job(conn, job)
+        samples.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    results["job_worker.process_job"] = summarize(samples)
+
+    list_queries = ["", "?sort=experience", "?skills=Python", "?status=Applied&min_experience=3", "?limit=200"]
+    results["GET /candidates"] = runner.run(
+        lambda client, i: client.get("/candidates" + list_queries[i % len(list_queries)]), requests)
+    results["GET /api/candidates"] = runner.run(
+        lambda client, i: client.get("/api/candidates" + list_queries[i % len(list_queries)]), requests)
+
+    rng = random.Random(seed)
+    rows = "".join(f"bench{i}@example.com,{rng.randint(0, 100)}\n" for i in range(requests))
+    csv_body = ("email,score\n" + rows).encode()
+    results["POST /upload_results"] = runner.run(lambda client, i: client.post("/upload_results", data={
+        "results_file": (io.BytesIO(csv_body), "results.csv"),
+    }), max(1, requests // 10))
+    results["POST /upload_results"]["rows_per_upload"] = requests
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--resumes", type=int, default=50, help="size of the synthetic corpus")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per parser method")
+    arg_parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--lean", action="store_true", help="benchmark the lean spaCy pipeline")
+    arg_parser.add_argument("--skip-parser", action="store_true")
+    arg_parser.add_argument("--skip-routes", action="store_true")
+    arg_parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = arg_parser.parse_args()
+
+    # The app and its modules read the database path at import time
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["ATS_DB_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["ATS_LEAN_PIPELINE"] = "1" if args.lean else "0"
+    subprocess.run([sys.executable, os.path.join(ROOT, "database_setup.py")], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    resumes = list(corpus.generate(args.resumes, args.seed))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "corpus": {
+            "resumes": len(resumes),
+            "pages": sum(resume["pdf"].count(b"/Type /Page ") for resume in resumes),
+            "pdf_bytes": sum(len(resume["pdf"]) for resume in resumes),
+            "text_chars": sum(len(resume["text"]) for resume in resumes),
+        },
+    }
+    if not args.skip_parser:
+        report["parser"] = bench_parser(resumes, args.repeat, args.lean)
+    if not args.skip_routes:
+        report["routes"] = bench_routes(resumes, args.requests, args.concurrency, args.seed)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
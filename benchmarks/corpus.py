@@ -0,0 +1,135 @@
+"""Deterministic synthetic resumes, as text and as PDFs, for the benchmarks.
+
+Usage: python benchmarks/corpus.py OUTPUT_DIR [--count N] [--seed N]
+The same seed always gives byte-identical files. PDFs are written by hand
+(one Helvetica font, one text block per page), so nothing beyond the
+standard library is needed to produce them.
+"""
+import os
+import random
+import argparse
+from typing import Dict, Iterator, List
+
+FIRST_NAMES = ["Aarav", "Priya", "James", "Maria", "Wei", "Fatima", "Lucas", "Ananya", "Omar", "Sofia",
+               "Rohan", "Emily", "Kenji", "Chloe", "Arjun", "Isabella", "David", "Meera", "Noah", "Zara"]
+LAST_NAMES = ["Sharma", "Patel", "Smith", "Garcia", "Chen", "Khan", "Silva", "Iyer", "Haddad", "Rossi",
+              "Verma", "Johnson", "Tanaka", "Martin", "Reddy", "Lopez", "Brown", "Nair", "Wilson", "Ali"]
+COMPANIES = ["Acme Corp", "Initech", "Globex", "Umbrella Systems", "Hooli", "Stark Industries", "Wayne Tech",
+             "Cyberdyne", "Soylent Labs", "Tyrell Analytics", "Wonka Digital", "Aperture Software"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Data Analyst", "Backend Developer",
+          "Frontend Developer", "DevOps Engineer", "Data Scientist", "Technical Lead", "QA Engineer"]
+SKILLS = ["Python", "Java", "JavaScript", "C++", "C#", "SQL", "React", "Angular", "Node.js", "Django", "Flask",
+          "Spring Boot", "AWS", "Azure", "Docker", "Kubernetes", "Git", "Machine Learning", "TensorFlow",
+          "Pandas", "PostgreSQL", "MySQL", "MongoDB", "REST API", "Agile", "Scrum", "Linux", "Jenkins"]
+QUALIFICATIONS = ["B.Tech in Computer Science", "M.Tech in Data Science", "B.E. in Electronics",
+                  "MCA", "BCA", "B.Sc in Mathematics", "M.Sc in Statistics", "MBA", "PhD in Computer Science"]
+VERBS = ["Built", "Designed", "Maintained", "Migrated", "Automated", "Optimised", "Led", "Tested", "Deployed"]
+OBJECTS = ["payment services", "reporting dashboards", "data pipelines", "a search platform", "internal tools",
+           "customer-facing APIs", "the CI/CD pipeline", "monitoring and alerting", "a recommendation engine"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+LINES_PER_PAGE = 48
+
+def _date_range(rng: random.Random, start_year: int, current: bool) -> str:
+    """A range in one of the formats resumes actually use."""
+    start_month = rng.randrange(12)
+    end_year = start_year + rng.randint(0, 4)
+    end = "Present" if current else f"{MONTHS[rng.randrange(12)]} {end_year}"
+    style = rng.randrange(4)
+    if style == 0:
+        return f"{MONTHS[start_month]} {start_year} - {end}"
+    if style == 1:
+        end = "Present" if current else f"{rng.randint(1, 12):02d}/{end_year}"
+        return f"{start_month + 1:02d}/{start_year} - {end}"
+    if style == 2:
+        return f"{start_year} - {'Present' if current else end_year}"
+    return f"{MONTHS[start_month]} {start_year} to {'date' if current else end}"
+
+def resume_lines(index: int, seed: int = 0) -> List[str]:
+    """The lines of resume number `index`. Length varies from under a page to several pages."""
+    rng = random.Random(seed * 1_000_003 + index)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILLS, rng.randint(3, 12))
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{index}@example.com | +1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        "",
+        "Education",
+    ]
+    for qualification in rng.sample(QUALIFICATIONS, rng.randint(1, 2)):
+        lines.append(f"{qualification}, {rng.randint(2000, 2020)}")
+
+    lines += ["", "Experience"]
+    year = rng.randint(2004, 2018)
+    jobs = rng.randint(1, 6)
+    for job in range(jobs):
+        current = job == jobs - 1 and rng.random() < 0.7
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)}, {_date_range(rng, year, current)}")
+        for _ in range(rng.randint(2, 6)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)}.")
+        year += rng.randint(1, 4)
+
+    # A few resumes get long project sections so page-level limits get exercised
+    if rng.random() < 0.3:
+        lines += ["", "Projects"]
+        for project in range(rng.randint(10, 150)):
+            lines.append(f"Project {project + 1}: {rng.choice(VERBS).lower()} {rng.choice(OBJECTS)} using "
+                         f"{rng.choice(SKILLS)} and {rng.choice(SKILLS)}.")
+
+    lines += ["", "Skills", ", ".join(skills)]
+    return lines
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def render_pdf(lines: List[str]) -> bytes:
+    """A minimal valid PDF with the lines laid out top to bottom, LINES_PER_PAGE to a page."""
+    pages = [lines[start:start + LINES_PER_PAGE] for start in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects: Dict[int, bytes] = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for number, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * number, 5 + 2 * number
+        kids.append(f"{page_id} 0 R")
+        text = " T*\n".join(f"({_escape(line)}) Tj" for line in page_lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 760 Td\n{text}\nET".encode("latin-1", "replace")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id])
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(objects):
+        out += b"%010d 00000 n \n" % offsets[object_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def generate(count: int, seed: int = 0) -> Iterator[Dict]:
+    """Yields {"index", "text", "pdf"} for `count` resumes."""
+    for index in range(count):
+        lines = resume_lines(index, seed)
+        yield {"index": index, "text": "\n".join(lines), "pdf": render_pdf(lines)}
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("output_dir")
+    arg_parser.add_argument("--count", type=int, default=100)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for resume in generate(args.count, args.seed):
+        with open(os.path.join(args.output_dir, f"resume_{resume['index']:05d}.pdf"), "wb") as pdf_file:
+            pdf_file.write(resume["pdf"])
+    print(f"Wrote {args.count} resumes to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
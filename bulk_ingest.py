@@ -0,0 +1,184 @@
+import os
+import io
+import sys
+import glob
+import json
+import time
+import sqlite3
+import zipfile
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Set, Tuple
+
+import db
+from resume_parser import ResumeParser, get_parser
+import parse_cache
+from skill_index import init_skill_index, backfill
+
+# A source is (source_id, path, zip_member). source_id is what the state file records.
+Source = Tuple[str, str, Optional[str]]
+
+def collect_sources(target: str) -> List[Source]:
+    """Expands a directory, glob pattern or .zip archive into the PDFs it contains."""
+    if zipfile.is_zipfile(target):
+        with zipfile.ZipFile(target) as archive:
+            return [(f"{os.path.abspath(target)}:{name}", target, name)
+                    for name in sorted(archive.namelist()) if name.lower().endswith('.pdf')]
+    if os.path.isdir(target):
+        paths = glob.glob(os.path.join(target, '**', '*'), recursive=True)
+    else:
+        paths = glob.glob(target, recursive=True)
+    return [(os.path.abspath(path), path, None)
+            for path in sorted(paths) if path.lower().endswith('.pdf') and os.path.isfile(path)]
+
+def extract_source(source: Source) -> Tuple[str, Optional[str], Optional[str], bool, Optional[str]]:
+    """Runs in the extraction pool. Returns (source_id, content_hash, text, truncated, error)."""
+    source_id, path, member = source
+    try:
+        if member is None:
+            with open(path, 'rb') as file:
+                data = file.read()
+        else:
+            with zipfile.ZipFile(path) as archive:
+                data = archive.read(member)
+        text, truncated = ResumeParser.extract_pdf(io.BytesIO(data))
+    except Exception as e:
+        return source_id, None, None, False, str(e)
+    if not text.strip():
+        return source_id, None, None, False, "no extractable text (empty or image-based PDF)"
+    return source_id, parse_cache.content_hash(data), text, truncated, None
+
+def load_state(state_path: str) -> Set[str]:
+    if not os.path.exists(state_path):
+        return set()
+    with open(state_path, encoding='utf-8') as state_file:
+        return {line.rstrip('\n') for line in state_file if line.strip()}
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, records: List[Tuple[str, dict]]) -> None:
+        for source_id, result in records:
+            self.file.write(json.dumps({"source": source_id, **result}) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+class DatabaseWriter:
+    def __init__(self, path: str):
+        self.conn = db.connect(path)
+        init_skill_index(self.conn)
+
+    def write(self, records: List[Tuple[str, dict]]) -> None:
+        last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM candidates").fetchone()[0]
+        # OR IGNORE: a resubmitted email must not abort the whole batch
+        self.conn.executemany('''
+        INSERT OR IGNORE INTO candidates (name, email, phone, education_qualifications, total_experience_years, skills, experience_summary, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 'Applied')
+        ''', [(
+            result.get('name'),
+            result.get('email'),
+            result.get('phone'),
+            ', '.join(result.get('education_qualifications', [])),
+            result.get('total_experience_years'),
+            ', '.join(result.get('skills', [])),
+            '\n'.join(result.get('experience_summary', []))
+        ) for _, result in records])
+        self.conn.commit()
+        # Index the skills of the rows just inserted
+        backfill(self.conn, after_id=last_id)
+
+    def close(self) -> None:
+        self.conn.close()
+
+def ingest(sources: List[Source], writer, state_path: str, workers: int = None, batch_size: int = 32,
+           n_process: int = 1, commit_every: int = 100, cache_conn: Optional[sqlite3.Connection] = None) -> dict:
+    """Extracts, parses and writes every source not already recorded in the state file.
+    With `cache_conn`, files already in the parse cache skip the NLP stage."""
+    done = load_state(state_path)
+    pending = [source for source in sources if source[0] not in done]
+    stats = {"total": len(sources), "skipped": len(sources) - len(pending), "parsed": 0, "failed": 0, "cached": 0}
+    print(f"{stats['total']} PDFs found, {stats['skipped']} already parsed, {len(pending)} to go.", file=sys.stderr)
+    if not pending:
+        return stats
+
+    parser = get_parser()
+    start = time.perf_counter()
+    cached: List[Tuple[str, dict]] = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(state_path, 'a', encoding='utf-8') as state_file:
+        def texts() -> Iterator[Tuple[str, tuple]]:
+            for source_id, digest, text, truncated, error in pool.map(extract_source, pending, chunksize=8):
+                if error:
+                    stats["failed"] += 1
+                    logging.error(f"Bulk ingest failed to read {source_id}: {error}")
+                    continue
+                if cache_conn is not None:
+                    hit = parse_cache.get(cache_conn, digest, parser.cache_version)
+                    if hit:
+                        stats["cached"] += 1
+                        cached.append((source_id, hit[1]))
+                        continue
+                yield text, (source_id, digest, text, truncated)
+
+        def flush(batch: List[Tuple[str, dict]]) -> None:
+            # Output first, then the state file: a crash in between re-parses the batch rather than losing it
+            writer.write(batch)
+            state_file.writelines(source_id + "\n" for source_id, _ in batch)
+            state_file.flush()
+            stats["parsed"] += len(batch)
+            done_count = stats["parsed"] + stats["failed"]
+            rate = done_count / (time.perf_counter() - start)
+            print(f"  {done_count}/{len(pending)} processed, {stats['failed']} failed, {rate:.1f} files/s", file=sys.stderr)
+
+        batch = []
+        for result, (source_id, digest, text, truncated) in parser.parse_many(texts(), batch_size=batch_size,
+                                                                              n_process=n_process):
+            # A file cut short by the page or time limit might be read in full next time
+            if cache_conn is not None and not truncated:
+                parse_cache.put(cache_conn, digest, parser.cache_version, text, result)
+            batch.append((source_id, result))
+            batch.extend(cached)
+            cached.clear()
+            if len(batch) >= commit_every:
+                flush(batch)
+                batch = []
+        batch.extend(cached)
+        if batch:
+            flush(batch)
+
+    logging.info(f"Bulk ingest finished: {stats}")
+    return stats
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Parse a directory, glob or zip archive of resumes in bulk.")
+    arg_parser.add_argument("target", help="directory, glob pattern (quote it) or .zip archive")
+    output = arg_parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--jsonl", help="append parsed results to this JSON Lines file")
+    output.add_argument("--db", help="insert parsed results into the candidates table of this SQLite database")
+    arg_parser.add_argument("--state", help="file recording finished sources (default: <output>.done)")
+    arg_parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes (default: CPU count)")
+    arg_parser.add_argument("--batch-size", type=int, default=32, help="nlp.pipe batch size")
+    arg_parser.add_argument("--n-process", type=int, default=1, help="nlp.pipe processes")
+    arg_parser.add_argument("--commit-every", type=int, default=100, help="results written per batch")
+    arg_parser.add_argument("--cache-db", help="SQLite database holding the parse cache (default: the --db database)")
+    args = arg_parser.parse_args()
+
+    sources = collect_sources(args.target)
+    writer = JsonlWriter(args.jsonl) if args.jsonl else DatabaseWriter(args.db)
+    state_path = args.state or f"{args.jsonl or args.db}.done"
+    cache_path = args.cache_db or args.db
+    cache_conn = db.connect(cache_path) if cache_path else None
+    if cache_conn is not None:
+        parse_cache.init_cache(cache_conn)
+    try:
+        stats = ingest(sources, writer, state_path, workers=args.workers, batch_size=args.batch_size,
+                       n_process=args.n_process, commit_every=args.commit_every, cache_conn=cache_conn)
+    finally:
+        writer.close()
+        if cache_conn is not None:
+            cache_conn.close()
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,128 @@
+import json
+import base64
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from skill_matcher import load_taxonomy
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Columns a caller may ask for. experience_summary is the heavy one and is
+# left out of the list view unless explicitly requested.
+ALLOWED_COLUMNS = ['id', 'name', 'email', 'phone', 'education_qualifications', 'total_experience_years',
+                   'skills', 'experience_summary', 'status', 'aptitude_score', 'aptitude_result']
+LIST_COLUMNS = [column for column in ALLOWED_COLUMNS if column != 'experience_summary']
+
+# sort name -> (key expression, direction). NULLs are folded into a sentinel so
+# the keyset comparison works; each expression has a matching index below.
+SORTS = {
+    'newest': ('c.id', 'DESC'),
+    'oldest': ('c.id', 'ASC'),
+    'experience': ('COALESCE(c.total_experience_years, -1)', 'DESC'),
+    'experience_asc': ('COALESCE(c.total_experience_years, -1)', 'ASC'),
+    'score': ('COALESCE(c.aptitude_score, -1)', 'DESC'),
+    'name': ("COALESCE(c.name, '')", 'ASC'),
+}
+DEFAULT_SORT = 'newest'
+# Sorts whose key is text; every other key (ids, experience, scores) is a number
+TEXT_SORTS = {'name'}
+
+def init_indexes(conn: sqlite3.Connection) -> None:
+    """Indexes backing the candidate list filters and sort orders."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_status ON candidates (status, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_aptitude_result ON candidates (aptitude_result, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_experience ON candidates (COALESCE(total_experience_years, -1), id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_score ON candidates (COALESCE(aptitude_score, -1), id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates (COALESCE(name, ''), id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interviews_candidate ON interviews (candidate_id)")
+    conn.commit()
+
+def encode_cursor(sort_value, candidate_id: int) -> str:
+    raw = json.dumps([sort_value, candidate_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str, sort: str = DEFAULT_SORT) -> Tuple:
+    """Raises ValueError for a cursor that wasn't produced by encode_cursor for `sort`."""
+    try:
+        sort_value, candidate_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    # The values are bound straight into the keyset query, so only scalars of the
+    # sort key's type get through (bool is an int to Python, but not to a cursor)
+    expected = (str,) if sort in TEXT_SORTS else (int, float)
+    if (not isinstance(candidate_id, int) or isinstance(candidate_id, bool)
+            or not isinstance(sort_value, expected) or isinstance(sort_value, bool)):
+        raise ValueError("Invalid cursor")
+    return sort_value, candidate_id
+
+def list_candidates(conn: sqlite3.Connection, columns: Sequence[str] = LIST_COLUMNS, sort: str = DEFAULT_SORT,
+                    cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, status: Sequence[str] = (),
+                    skills: Sequence[str] = (), min_experience: Optional[float] = None,
+                    max_experience: Optional[float] = None, aptitude_result: Optional[str] = None) -> Dict:
+    """Returns one page of candidates as {"candidates": [...], "next_cursor": str or None}.
+
+    Pages are keyset-based: the cursor holds the sort key and id of the last row
+    of the previous page, so every page costs the same regardless of depth.
+    Raises ValueError for an unknown sort, column or malformed cursor."""
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort '{sort}'")
+    unknown = [column for column in columns if column not in ALLOWED_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    key, direction = SORTS[sort]
+
+    where: List[str] = []
+    args: List = []
+    if status:
+        where.append(f"c.status IN ({', '.join('?' * len(status))})")
+        args.extend(status)
+    # Skills go through the candidate_skills index (see skill_index.py)
+    # rather than a LIKE scan over the skills column
+    for skill in load_taxonomy().canonical_skills(skills):
+        where.append("""EXISTS (SELECT 1 FROM candidate_skills cs JOIN skills s ON s.id = cs.skill_id
+                               WHERE s.name = ? AND cs.candidate_id = c.id)""")
+        args.append(skill)
+    if min_experience is not None:
+        where.append("c.total_experience_years >= ?")
+        args.append(min_experience)
+    if max_experience is not None:
+        where.append("c.total_experience_years <= ?")
+        args.append(max_experience)
+    if aptitude_result:
+        where.append("c.aptitude_result = ?")
+        args.append(aptitude_result)
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort)
+        comparison = '<' if direction == 'DESC' else '>'
+        if key == 'c.id':
+            where.append(f"c.id {comparison} ?")
+            args.append(last_id)
+        else:
+            # Spelled out rather than as a row value so SQLite seeks into the index
+            where.append(f"{key} {comparison}= ? AND ({key} {comparison} ? OR c.id {comparison} ?)")
+            args.extend([sort_value, sort_value, last_id])
+
+    select = ', '.join(f"c.{column} AS {column}" for column in columns if column != 'id')
+    sql = f"""
+        SELECT c.id, {key} AS sort_key{', ' + select if select else ''},
+               (SELECT i.id FROM interviews i WHERE i.candidate_id = c.id LIMIT 1) AS interview_id
+        FROM candidates c
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY {key} {direction}, c.id {direction}
+        LIMIT ?
+    """
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(sql, args + [limit + 1]).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['sort_key'], rows[-1]['id'])
+    candidates = []
+    for row in rows:
+        candidate = dict(row)
+        del candidate['sort_key']
+        candidates.append(candidate)
+    return {"candidates": candidates, "next_cursor": next_cursor}
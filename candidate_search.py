@@ -0,0 +1,87 @@
+import re
+import html
+import sqlite3
+from typing import Dict, List
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# bm25 column weights, in the column order of candidates_fts
+WEIGHTS = {'name': 2.0, 'skills': 5.0, 'education_qualifications': 3.0, 'experience_summary': 1.0}
+SEARCH_COLUMNS = list(WEIGHTS)
+# snippet() marks matches with these private-use characters; the text around them is
+# applicant-supplied, so it is HTML-escaped before they become <mark> tags
+_MARK_OPEN, _MARK_CLOSE = '\ue000', '\ue001'
+
+def init_search(conn: sqlite3.Connection) -> None:
+    """Creates the FTS5 index over candidates and the triggers that keep it in sync.
+    The index is built from existing rows the first time it is created."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'candidates_fts'").fetchone()
+    # '+' and '#' are part of tokens so C++ and C# stay searchable; prefix
+    # indexes make short prefix queries cheap
+    conn.execute(f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+        {', '.join(SEARCH_COLUMNS)},
+        content='candidates', content_rowid='id',
+        tokenize="unicode61 tokenchars '+#'", prefix='2 3'
+    );
+    ''')
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f"NEW.{column}" for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f"OLD.{column}" for column in SEARCH_COLUMNS)
+    conn.executescript(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_candidates_fts_insert AFTER INSERT ON candidates
+    BEGIN
+        INSERT INTO candidates_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_candidates_fts_delete AFTER DELETE ON candidates
+    BEGIN
+        INSERT INTO candidates_fts (candidates_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_candidates_fts_update AFTER UPDATE OF {columns} ON candidates
+    BEGIN
+        INSERT INTO candidates_fts (candidates_fts, rowid, {columns}) VALUES ('delete', OLD.id, {old_values});
+        INSERT INTO candidates_fts (rowid, {columns}) VALUES (NEW.id, {new_values});
+    END;
+    ''')
+    if not exists:
+        conn.execute("INSERT INTO candidates_fts (candidates_fts) VALUES ('rebuild')")
+    conn.commit()
+
+def build_match_query(text: str, prefix: bool = True) -> str:
+    """Turns free text into an FTS5 query: every word must match, each as a quoted
+    string so user input can't inject FTS syntax, with prefix matching if asked."""
+    terms = re.findall(r"[\w+#]+", text)
+    return ' '.join(f'"{term}"' + ('*' if prefix else '') for term in terms)
+
+def search_candidates(conn: sqlite3.Connection, text: str, limit: int = DEFAULT_SEARCH_LIMIT,
+                      prefix: bool = True) -> List[Dict]:
+    """Best matches for `text` ranked by BM25, each with a highlighted snippet.
+    Snippets are HTML-escaped, with matches wrapped in <mark>."""
+    match = build_match_query(text, prefix)
+    if not match:
+        return []
+    limit = max(1, min(int(limit), MAX_SEARCH_LIMIT))
+    conn.row_factory = sqlite3.Row
+    weights = ', '.join(str(weight) for weight in WEIGHTS.values())
+    rows = conn.execute(f"""
+        SELECT c.id, c.name AS name, c.email AS email, c.status AS status,
+               c.total_experience_years AS total_experience_years, c.skills AS skills,
+               snippet(candidates_fts, -1, ?, ?, '…', 12) AS snippet,
+               bm25(candidates_fts, {weights}) AS score
+        FROM candidates_fts
+        JOIN candidates c ON c.id = candidates_fts.rowid
+        WHERE candidates_fts MATCH ?
+        ORDER BY score
+        LIMIT ?
+    """, (_MARK_OPEN, _MARK_CLOSE, match, limit)).fetchall()
+    results = []
+    for row in rows:
+        result = dict(row)
+        if result['snippet'] is not None:
+            result['snippet'] = (html.escape(result['snippet'])
+                                 .replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>'))
+        results.append(result)
+    return results
@@ -0,0 +1,141 @@
+import os
+import sqlite3
+from typing import Dict, List, Optional, Sequence
+
+from candidate_queries import LIST_COLUMNS
+
+DEFAULT_CHANGES_LIMIT = 500
+# Change log rows kept. A client whose cursor falls further behind than this many
+# changes gets a resync (410 / "resync" event) and reloads the list. Pruned by the
+# job workers every job_queue.MAINTENANCE_INTERVAL seconds.
+CHANGES_RETAINED = int(os.environ.get('ATS_CHANGES_RETAINED', '100000'))
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    columns = [row[1].lower() for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def init_change_feed(conn: sqlite3.Connection) -> None:
+    """Adds revision/updated_at columns, the change log and the triggers that maintain them.
+
+    Every insert, update or delete of a candidate or one of its interviews appends
+    a row to candidate_changes; its autoincrement id is the global revision."""
+    for table in ('candidates', 'interviews'):
+        _add_column(conn, table, 'revision', 'INTEGER')
+        _add_column(conn, table, 'updated_at', 'TEXT')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS candidate_changes (
+        revision INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        changed_at TEXT NOT NULL
+    );
+    ''')
+    # The guards on revision stop the triggers' own bookkeeping UPDATEs from logging again
+    conn.executescript(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_candidates_insert AFTER INSERT ON candidates
+    BEGIN
+        INSERT INTO candidate_changes (candidate_id, op, changed_at) VALUES (NEW.id, 'upsert', {_NOW});
+        UPDATE candidates SET revision = (SELECT MAX(revision) FROM candidate_changes), updated_at = {_NOW}
+        WHERE id = NEW.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_candidates_update AFTER UPDATE ON candidates
+    WHEN NEW.revision IS OLD.revision
+    BEGIN
+        INSERT INTO candidate_changes (candidate_id, op, changed_at) VALUES (NEW.id, 'upsert', {_NOW});
+        UPDATE candidates SET revision = (SELECT MAX(revision) FROM candidate_changes), updated_at = {_NOW}
+        WHERE id = NEW.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_candidates_delete AFTER DELETE ON candidates
+    BEGIN
+        INSERT INTO candidate_changes (candidate_id, op, changed_at) VALUES (OLD.id, 'delete', {_NOW});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_interviews_insert AFTER INSERT ON interviews
+    BEGIN
+        INSERT INTO candidate_changes (candidate_id, op, changed_at) VALUES (NEW.candidate_id, 'upsert', {_NOW});
+        UPDATE interviews SET revision = (SELECT MAX(revision) FROM candidate_changes), updated_at = {_NOW}
+        WHERE id = NEW.id;
+        UPDATE candidates SET revision = (SELECT MAX(revision) FROM candidate_changes), updated_at = {_NOW}
+        WHERE id = NEW.candidate_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_interviews_update AFTER UPDATE ON interviews
+    WHEN NEW.revision IS OLD.revision
+    BEGIN
+        INSERT INTO candidate_changes (candidate_id, op, changed_at) VALUES (NEW.candidate_id, 'upsert', {_NOW});
+        UPDATE interviews SET revision = (SELECT MAX(revision) FROM candidate_changes), updated_at = {_NOW}
+        WHERE id = NEW.id;
+        UPDATE candidates SET revision = (SELECT MAX(revision) FROM candidate_changes), updated_at = {_NOW}
+        WHERE id = NEW.candidate_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_interviews_delete AFTER DELETE ON interviews
+    BEGIN
+        INSERT INTO candidate_changes (candidate_id, op, changed_at) VALUES (OLD.candidate_id, 'upsert', {_NOW});
+        UPDATE candidates SET revision = (SELECT MAX(revision) FROM candidate_changes), updated_at = {_NOW}
+        WHERE id = OLD.candidate_id;
+    END;
+    ''')
+    conn.commit()
+
+def current_revision(conn: sqlite3.Connection) -> int:
+    """Latest revision; a single lookup on the change log's primary key."""
+    return conn.execute("SELECT COALESCE(MAX(revision), 0) FROM candidate_changes").fetchone()[0]
+
+def oldest_revision(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MIN(revision), 0) FROM candidate_changes").fetchone()[0]
+
+def changes_since(conn: sqlite3.Connection, since: int, limit: int = DEFAULT_CHANGES_LIMIT,
+                  columns: Sequence[str] = LIST_COLUMNS) -> Optional[Dict]:
+    """Candidates changed after revision `since`, collapsed to their latest state.
+
+    Returns {"changed": [rows], "deleted": [ids], "cursor": int, "has_more": bool},
+    or None when `since` predates the retained change log and the client must resync."""
+    if oldest_revision(conn) > since + 1:
+        return None
+    # SQLite fills the bare `op` column from the row holding MAX(revision)
+    latest = conn.execute("""
+        SELECT candidate_id, MAX(revision) AS revision, op
+        FROM candidate_changes
+        WHERE revision > ?
+        GROUP BY candidate_id
+        ORDER BY revision
+        LIMIT ?
+    """, (since, limit + 1)).fetchall()
+    has_more = len(latest) > limit
+    latest = latest[:limit]
+
+    upserted = [row[0] for row in latest if row[2] == 'upsert']
+    changed: List[Dict] = []
+    if upserted:
+        conn.row_factory = sqlite3.Row
+        select = ', '.join(f"c.{column} AS {column}" for column in columns if column != 'id')
+        rows = conn.execute(f"""
+            SELECT c.id{', ' + select if select else ''}, c.revision AS revision, c.updated_at AS updated_at,
+                   (SELECT i.id FROM interviews i WHERE i.candidate_id = c.id LIMIT 1) AS interview_id
+            FROM candidates c
+            WHERE c.id IN ({', '.join('?' * len(upserted))})
+        """, upserted).fetchall()
+        changed = [dict(row) for row in rows]
+    found = {row['id'] for row in changed}
+    # An upsert whose row is gone was deleted by a later, not yet returned, change
+    deleted = [row[0] for row in latest if row[2] == 'delete' or row[0] not in found]
+
+    return {
+        "changed": changed,
+        "deleted": deleted,
+        "cursor": latest[-1][1] if latest else max(since, current_revision(conn)),
+        "has_more": has_more,
+    }
+
+def prune_changes(conn: sqlite3.Connection, keep: int = CHANGES_RETAINED) -> int:
+    """Drops all but the newest `keep` change log rows. Clients with older cursors get a resync."""
+    removed = conn.execute("DELETE FROM candidate_changes WHERE revision <= ?",
+                           (current_revision(conn) - keep,)).rowcount
+    conn.commit()
+    return removed
@@ -1,42 +1,82 @@
 import sqlite3
+import db
+from db import DB_PATH
+from job_queue import init_queue
+from parse_cache import init_cache
+from candidate_queries import init_indexes
+from change_feed import init_change_feed
+from mail_sender import init_outbox
+from candidate_search import init_search
+from skill_index import init_skill_index
+from metrics import init_metrics
 
-conn = sqlite3.connect('ats.db')
-cursor = conn.cursor()
-
-# --- Create the candidates table ---
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS candidates (
-    id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, email TEXT UNIQUE, phone TEXT,
-    education_qualifications TEXT, total_experience_years REAL, skills TEXT,
-    experience_summary TEXT, status TEXT, aptitude_score INTEGER, aptitude_result TEXT
-);
-''')
-
-# --- Create the interviews table ---
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS interviews (
-    id INTEGER PRIMARY KEY AUTOINCREMENT, candidate_id INTEGER, interviewer_name TEXT,
-    interview_date TEXT, interview_time TEXT, comments TEXT,
-    FOREIGN KEY (candidate_id) REFERENCES candidates (id)
-);
-''')
-
-# --- NEW: Create the users table for HR login ---
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE NOT NULL,
-    password TEXT NOT NULL
-);
-''')
-
-# --- NEW: Insert a default HR user ---
-try:
-    cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", ('hr', 'password'))
-except sqlite3.IntegrityError:
-    pass # User already exists
-
-conn.commit()
-conn.close()
-
-print("Database 'ats.db' with all tables created successfully.")
\ No newline at end of file
+def create_schema(conn: sqlite3.Connection) -> None:
+    """Creates every table, index and trigger the app uses, and brings an existing
+    database up to date. Safe to run repeatedly. Runs here, and once at startup in
+    serve.py and the development server, rather than in every web process."""
+    cursor = conn.cursor()
+
+    # --- Create the candidates table ---
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS candidates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, email TEXT UNIQUE, phone TEXT,
+        education_qualifications TEXT, total_experience_years REAL, skills TEXT,
+        experience_summary TEXT, status TEXT, aptitude_score INTEGER, aptitude_result TEXT
+    );
+    ''')
+
+    # --- Create the interviews table ---
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS interviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, candidate_id INTEGER, interviewer_name TEXT,
+        interview_date TEXT, interview_time TEXT, comments TEXT,
+        FOREIGN KEY (candidate_id) REFERENCES candidates (id)
+    );
+    ''')
+
+    # --- NEW: Create the users table for HR login ---
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL
+    );
+    ''')
+
+    # --- NEW: Insert a default HR user ---
+    try:
+        cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", ('hr', 'password'))
+    except sqlite3.IntegrityError:
+        pass # User already exists
+
+    conn.commit()
+
+    # --- Create the resume parsing job queue ---
+    init_queue(conn)
+
+    # --- Create the parse result cache ---
+    init_cache(conn)
+
+    # --- Indexes for the paginated candidate list ---
+    init_indexes(conn)
+
+    # --- Revision columns and change log for the candidate change feed ---
+    init_change_feed(conn)
+
+    # --- Outbox for queued email ---
+    init_outbox(conn)
+
+    # --- Full-text search index over candidates ---
+    init_search(conn)
+
+    # --- Normalized skills and the candidate skill index ---
+    init_skill_index(conn)
+
+    # --- Shared stage timing metrics ---
+    init_metrics(conn)
+
+if __name__ == "__main__":
+    conn = db.connect(DB_PATH)
+    create_schema(conn)
+    conn.close()
+    print(f"Database '{DB_PATH}' with all tables created successfully.")
@@ -0,0 +1,29 @@
+"""Gunicorn settings for serving the app: gunicorn -c gunicorn.conf.py app:app
+(python serve.py runs this along with the resume workers and the email sender).
+
+With preload_app the master imports app.py once and forks the web workers
+from it, so they share its memory copy-on-write and start serving at once.
+Set ATS_PRELOAD_PARSER=1 as well to load the spaCy model in the master too
+(only needed if web workers parse; resume jobs run in job_queue.py workers,
+which preload the model in their own parent).
+"""
+import gc
+import os
+import multiprocessing
+
+bind = os.environ.get('ATS_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('ATS_WEB_WORKERS', str(min(4, multiprocessing.cpu_count()))))
+# More threads than the per-route limits in app.py add up to (UPLOAD_CONCURRENCY,
+# API_CONCURRENCY, STREAM_CONCURRENCY), so no one route can take every thread and a
+# request over a limit gets a quick 503 instead of waiting in gunicorn's queue
+threads = int(os.environ.get('ATS_WEB_THREADS', '24'))
+# Connections a worker accepts at once, and the kernel's queue of connections not yet
+# accepted; beyond these, new connections are turned away at the socket
+worker_connections = int(os.environ.get('ATS_WEB_MAX_CONNECTIONS', str(threads * 4)))
+backlog = int(os.environ.get('ATS_WEB_BACKLOG', '256'))
+preload_app = os.environ.get('ATS_PRELOAD_APP', '1') == '1'
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before any worker is forked
+    if preload_app:
+        gc.freeze()
@@ -0,0 +1,296 @@
+import gc
+import sqlite3
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+from typing import Optional, List
+
+import db
+from db import DB_PATH
+from resume_parser import get_parser, warm_up, PdfTooLarge
+from mail_sender import init_outbox, queue_email
+import parse_cache
+import metrics
+from skill_index import init_skill_index, set_candidate_skills
+from change_feed import prune_changes
+
+POLL_INTERVAL = 1.0
+MAX_ATTEMPTS = 3
+# A job left 'running' for longer than this is assumed to belong to a dead worker
+STALE_AFTER = 600
+# How often each worker requeues such jobs (so they don't wait for the next restart)
+# and prunes the candidate change log
+MAINTENANCE_INTERVAL = 60
+# How often the parent checks for worker processes that have died (say OOM-killed) and replaces them
+SUPERVISE_INTERVAL = 5.0
+# Load the spaCy model once in the parent and fork the workers from it, so they
+# share its memory copy-on-write and start taking jobs immediately
+PRELOAD_MODEL = os.environ.get('ATS_PRELOAD_WORKERS', '1') == '1'
+
+def init_queue(conn: sqlite3.Connection) -> None:
+    """Creates the resume job table if it doesn't exist yet."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS resume_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_id INTEGER,
+        file_path TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at REAL,
+        started_at REAL,
+        finished_at REAL,
+        FOREIGN KEY (candidate_id) REFERENCES candidates (id)
+    );
+    ''')
+    # Uploads are kept in the job row rather than in temp_resumes/; file_path
+    # then only records the uploaded file name
+    if 'payload' not in [row[1] for row in conn.execute("PRAGMA table_info(resume_jobs)")]:
+        conn.execute("ALTER TABLE resume_jobs ADD COLUMN payload BLOB")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resume_jobs_status ON resume_jobs (status, id)")
+    conn.commit()
+
+def enqueue(cursor: sqlite3.Cursor, candidate_id: int, file_name: str, payload: bytes) -> int:
+    """Adds a parse job for an uploaded resume, stored with the job. The caller commits."""
+    cursor.execute("""
+        INSERT INTO resume_jobs (candidate_id, file_path, payload, status, created_at)
+        VALUES (?, ?, ?, 'queued', ?)
+    """, (candidate_id, file_name, payload, time.time()))
+    return cursor.lastrowid
+
+def get_job(conn: sqlite3.Connection, job_id: int) -> Optional[sqlite3.Row]:
+    conn.row_factory = sqlite3.Row
+    return conn.execute("""
+        SELECT j.id, j.candidate_id, j.status, j.attempts, j.created_at, j.started_at, j.finished_at,
+               c.status AS candidate_status
+        FROM resume_jobs j
+        LEFT JOIN candidates c ON c.id = j.candidate_id
+        WHERE j.id = ?
+    """, (job_id,)).fetchone()
+
+def claim_job(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+    """Atomically moves the oldest queued job to 'running' and returns it."""
+    conn.row_factory = sqlite3.Row
+    job = conn.execute("""
+        UPDATE resume_jobs
+        SET status = 'running', started_at = ?, attempts = attempts + 1
+        WHERE id = (SELECT id FROM resume_jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+        RETURNING id, candidate_id, file_path, payload, attempts
+    """, (time.time(),)).fetchone()
+    conn.commit()
+    return job
+
+def requeue_stale(conn: sqlite3.Connection, older_than: float = STALE_AFTER) -> int:
+    """Puts jobs abandoned by a crashed worker back on the queue, and returns how many.
+    A job that has used up its attempts is failed instead, so a file that takes down
+    whichever worker parses it isn't retried forever."""
+    conn.row_factory = sqlite3.Row
+    cutoff = time.time() - older_than
+    exhausted = conn.execute("""
+        SELECT id, candidate_id, attempts FROM resume_jobs
+        WHERE status = 'running' AND started_at < ? AND attempts >= ?
+    """, (cutoff, MAX_ATTEMPTS)).fetchall()
+    for job in exhausted:
+        _retry_or_fail(conn, job, "The worker processing this job stopped", retry=False)
+        _notify_candidate(conn, job['candidate_id'])
+    cursor = conn.execute("""
+        UPDATE resume_jobs SET status = 'queued'
+        WHERE status = 'running' AND started_at < ?
+    """, (cutoff,))
+    conn.commit()
+    return cursor.rowcount
+
+def _finish(conn: sqlite3.Connection, job_id: int, status: str, error: Optional[str] = None) -> None:
+    # The upload isn't needed once the job is over
+    conn.execute("UPDATE resume_jobs SET status = ?, error = ?, finished_at = ?, payload = NULL WHERE id = ?",
+                 (status, error, time.time(), job_id))
+
+def _notify_candidate(conn: sqlite3.Connection, candidate_id: int) -> None:
+    """Queues the confirmation email. The caller commits, together with the job's outcome."""
+    candidate = conn.execute("SELECT name, email FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+    if candidate:
+        subject = "Application Received"
+        body = f"Hello {candidate['name']},\n\nThank you for applying. We have successfully received your resume.\n\nOur team will review your application and contact you if your qualifications meet our needs.\n\nBest regards,\nHR Team"
+        queue_email(conn, candidate['email'], subject, body)
+
+def process_job(conn: sqlite3.Connection, job: sqlite3.Row) -> None:
+    """Parses the resume for a claimed job and fills in the candidate row."""
+    with metrics.sampling(), metrics.stage("job"):
+        _process_job(conn, job)
+
+def _process_job(conn: sqlite3.Connection, job: sqlite3.Row) -> None:
+    try:
+        parser = get_parser()
+        data = job['payload']
+        if data is None:
+            # Queued before uploads were stored in the job row
+            with open(job['file_path'], 'rb') as file:
+                data = file.read()
+        # Resubmitted files skip extraction and parsing entirely
+        digest = parse_cache.content_hash(data)
+        with metrics.stage("cache_lookup"):
+            cached = parse_cache.get(conn, digest, parser.cache_version)
+        if cached:
+            parsed_data = cached[1]
+        else:
+            resume_text, truncated = parser.extract_pdf(io.BytesIO(data))
+            parsed_data = parser.parse(resume_text)
+            # A file cut short by the page or time limit might be read in full next time
+            if not truncated:
+                parse_cache.put(conn, digest, parser.cache_version, resume_text, parsed_data)
+    except Exception as e:
+        logging.error(f"Job {job['id']} failed on attempt {job['attempts']}: {e}")
+        # A file over the size limit will be just as big next time
+        if not _retry_or_fail(conn, job, str(e), retry=not isinstance(e, PdfTooLarge)):
+            return
+    else:
+        with metrics.stage("db_write"):
+            _store_result(conn, job, parsed_data)
+        logging.info(f"Job {job['id']} parsed resume for candidate #{job['candidate_id']}")
+
+    # The email is committed with the job's outcome, so neither is ever saved without the other
+    _notify_candidate(conn, job['candidate_id'])
+    conn.commit()
+    if job['payload'] is None and os.path.exists(job['file_path']):
+        os.remove(job['file_path'])
+
+def _retry_or_fail(conn: sqlite3.Connection, job: sqlite3.Row, error: str, retry: bool = True) -> bool:
+    """Puts the job back on the queue (and commits) if it has attempts left and returns False.
+    Otherwise marks it failed, without committing, and returns True."""
+    if retry and job['attempts'] < MAX_ATTEMPTS:
+        conn.execute("UPDATE resume_jobs SET status = 'queued', error = ? WHERE id = ?", (error, job['id']))
+        conn.commit()
+        return False
+    # Out of retries: keep the application, just without parsed details
+    _finish(conn, job['id'], 'failed', error)
+    # HR may already have moved the candidate on while the job was queued
+    conn.execute("UPDATE candidates SET status = 'Applied' WHERE id = ? AND status = 'Processing'",
+                 (job['candidate_id'],))
+    return True
+
+def _store_result(conn: sqlite3.Connection, job: sqlite3.Row, parsed_data: dict) -> None:
+    """Fills in the candidate from the parse result. The caller commits."""
+    conn.execute("""
+        UPDATE candidates
+        SET phone = ?, education_qualifications = ?, total_experience_years = ?,
+            skills = ?, experience_summary = ?,
+            status = CASE WHEN status = 'Processing' THEN 'Applied' ELSE status END
+        WHERE id = ?
+    """, (
+        parsed_data.get('phone'),
+        ', '.join(parsed_data.get('education_qualifications', [])),
+        parsed_data.get('total_experience_years'),
+        ', '.join(parsed_data.get('skills', [])),
+        '\n'.join(parsed_data.get('experience_summary', [])),
+        job['candidate_id']
+    ))
+    set_candidate_skills(conn, job['candidate_id'], parsed_data.get('skills', []))
+    _finish(conn, job['id'], 'done')
+
+def work_once(conn: sqlite3.Connection) -> bool:
+    """Claims and processes one job; returns False if the queue was empty. Never raises:
+    a job that can't be completed (say the database stays locked past busy_timeout) is
+    logged and retried, so one bad job can't take the worker down."""
+    job = None
+    try:
+        job = claim_job(conn)
+        if job is None:
+            return False
+        process_job(conn, job)
+    except Exception as e:
+        logging.exception(f"Worker error on job {job['id'] if job is not None else '(claim)'}: {e}")
+        try:
+            conn.rollback()
+            if job is not None and _retry_or_fail(conn, job, str(e)):
+                _notify_candidate(conn, job['candidate_id'])
+                conn.commit()
+        except sqlite3.Error:
+            # Still stuck: requeue_stale puts the job back once it has gone stale
+            conn.rollback()
+    return True
+
+def _maintain(conn: sqlite3.Connection) -> None:
+    try:
+        requeue_stale(conn)
+        prune_changes(conn)
+    except sqlite3.Error as e:
+        conn.rollback()
+        logging.warning(f"Worker maintenance failed: {e}")
+
+def run_worker(db_path: str = DB_PATH, poll_interval: float = POLL_INTERVAL,
+               maintenance_interval: float = MAINTENANCE_INTERVAL) -> None:
+    """Worker loop: claims and processes jobs until the process is terminated."""
+    conn = db.connect(db_path)
+    get_parser()  # load the model before taking work
+    flusher = metrics.Flusher()
+    last_maintenance = time.monotonic()
+    while True:
+        worked = work_once(conn)
+        flusher.maybe_flush(conn)
+        if time.monotonic() - last_maintenance >= maintenance_interval:
+            _maintain(conn)
+            last_maintenance = time.monotonic()
+        if not worked:
+            time.sleep(poll_interval)
+
+# How start_workers started its workers, so replacements start the same way
+_worker_context = multiprocessing
+
+def start_workers(count: int, db_path: str = DB_PATH, preload: bool = PRELOAD_MODEL) -> List[multiprocessing.Process]:
+    """Starts `count` worker processes and returns them. With `preload` (and fork
+    available) the model is loaded here first and inherited by every worker."""
+    conn = db.connect(db_path)
+    init_queue(conn)
+    parse_cache.init_cache(conn)
+    init_outbox(conn)
+    init_skill_index(conn)
+    metrics.init_metrics(conn)
+    requeue_stale(conn)
+    conn.close()
+    global _worker_context
+    _worker_context = multiprocessing
+    if preload and 'fork' in multiprocessing.get_all_start_methods():
+        warm_up()
+        # Move everything loaded so far out of the collector's reach; otherwise each
+        # collection in a child touches those objects and un-shares their pages
+        gc.freeze()
+        _worker_context = multiprocessing.get_context('fork')
+    return [_start_worker(db_path, f"resume-worker-{i}") for i in range(count)]
+
+def _start_worker(db_path: str, name: str) -> multiprocessing.Process:
+    worker = _worker_context.Process(target=run_worker, args=(db_path,), name=name, daemon=True)
+    worker.start()
+    return worker
+
+def restart_dead_workers(workers: List[multiprocessing.Process], db_path: str = DB_PATH) -> int:
+    """Replaces, in place, every worker in `workers` that has exited. Returns how many.
+    Whatever job a dead worker held is picked up again by requeue_stale."""
+    restarted = 0
+    for i, worker in enumerate(workers):
+        if worker.is_alive():
+            continue
+        logging.warning(f"{worker.name} exited with code {worker.exitcode}; starting a replacement")
+        workers[i] = _start_worker(db_path, worker.name)
+        restarted += 1
+    return restarted
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run resume parsing workers.")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--db", default=DB_PATH)
+    arg_parser.add_argument("--no-preload", dest="preload", action="store_false", default=PRELOAD_MODEL,
+                            help="have each worker load the model itself instead of sharing the parent's")
+    args = arg_parser.parse_args()
+
+    workers = start_workers(args.workers, args.db, args.preload)
+    print(f"Started {len(workers)} resume worker(s). Press CTRL+C to stop.")
+    try:
+        while True:
+            restart_dead_workers(workers, args.db)
+            time.sleep(SUPERVISE_INTERVAL)
+    except KeyboardInterrupt:
+        sys.exit(0)
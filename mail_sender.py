@@ -1,31 +1,241 @@
 import smtplib
 from email.mime.text import MIMEText
 import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Optional
+
+import db
+import metrics
+from db import DB_PATH
 
 # --- Email Configuration ---
-# Reads credentials from environment variables for security
-SMTP_SERVER = 'smtp.gmail.com'
-SMTP_PORT = 587
+# Reads credentials from environment variables for security.
+# Point SMTP_SERVER/SMTP_PORT at a local server (e.g. aiosmtpd) and set
+# SMTP_USE_TLS=0 for testing; EMAIL_PASSWORD is then optional.
+SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', '1') == '1'
 EMAIL_SENDER = os.environ.get('EMAIL_SENDER')
 EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD')
 
+# --- Outbox Configuration ---
+OUTBOX_BATCH_SIZE = 20
+OUTBOX_RATE_PER_SECOND = float(os.environ.get('OUTBOX_RATE_PER_SECOND', '5'))
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_BACKOFF_SECONDS = 30
+OUTBOX_POLL_INTERVAL = 2
+# A message left 'sending' for longer than this is assumed to belong to a dead sender and is
+# claimed again. It has to outlast a batch, each message of which may wait out two SMTP timeouts.
+OUTBOX_LEASE_SECONDS = float(os.environ.get('OUTBOX_LEASE_SECONDS', '1800'))
+# Close the SMTP connection after this long without mail instead of letting the server drop it
+SMTP_IDLE_TIMEOUT = 60
+
+def _credentials_missing() -> bool:
+    return not EMAIL_SENDER or (SMTP_USE_TLS and not EMAIL_PASSWORD)
+
+def _build_message(recipient, subject, body) -> MIMEText:
+    msg = MIMEText(body)
+    msg['Subject'] = subject
+    msg['From'] = EMAIL_SENDER
+    msg['To'] = recipient
+    return msg
+
+def _connect() -> smtplib.SMTP:
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30)
+    if SMTP_USE_TLS:
+        server.starttls()  # Secure the connection
+    if EMAIL_PASSWORD:
+        server.login(EMAIL_SENDER, EMAIL_PASSWORD)
+    return server
+
 def send_email(recipient, subject, body):
-    """A simple function to send an email."""
+    """A simple function to send an email right away over its own connection.
+    Request handlers should use queue_email instead."""
     # Check if credentials are set
-    if not EMAIL_SENDER or not EMAIL_PASSWORD:
+    if _credentials_missing():
         print("Error: Email credentials are not set in the environment.")
         return
 
     try:
-        msg = MIMEText(body)
-        msg['Subject'] = subject
-        msg['From'] = EMAIL_SENDER
-        msg['To'] = recipient
-
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()  # Secure the connection
-            server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_SENDER, [recipient], msg.as_string())
+        with _connect() as server:
+            server.sendmail(EMAIL_SENDER, [recipient], _build_message(recipient, subject, body).as_string())
         print(f"Email sent successfully to {recipient}")
     except Exception as e:
-        print(f"Error sending email: {e}")
\ No newline at end of file
+        print(f"Error sending email: {e}")
+
+# --- Outbox ---
+
+def init_outbox(conn: sqlite3.Connection) -> None:
+    """Creates the email outbox table if it doesn't exist yet."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recipient TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        sent_at REAL
+    );
+    ''')
+    if 'claimed_at' not in [row[1] for row in conn.execute("PRAGMA table_info(email_outbox)")]:
+        conn.execute("ALTER TABLE email_outbox ADD COLUMN claimed_at REAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at)")
+    conn.commit()
+
+def queue_email(cursor, recipient, subject, body) -> int:
+    """Adds an email to the outbox. The caller commits, so the email is only sent
+    if the change it announces is committed too."""
+    now = time.time()
+    return cursor.execute("""
+        INSERT INTO email_outbox (recipient, subject, body, status, next_attempt_at, created_at)
+        VALUES (?, ?, ?, 'pending', ?, ?)
+    """, (recipient, subject, body, now, now)).lastrowid
+
+class OutboxSender:
+    """Background sender that drains the outbox over one reused SMTP connection."""
+
+    def __init__(self, db_path: str = DB_PATH, batch_size: int = OUTBOX_BATCH_SIZE,
+                 rate_per_second: float = OUTBOX_RATE_PER_SECOND, max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 backoff_seconds: float = OUTBOX_BACKOFF_SECONDS, poll_interval: float = OUTBOX_POLL_INTERVAL,
+                 lease_seconds: float = OUTBOX_LEASE_SECONDS):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.min_interval = 1.0 / rate_per_second if rate_per_second > 0 else 0
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.server: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+        self.last_sent = 0.0
+        self.stop_event = threading.Event()
+
+    def _server(self) -> smtplib.SMTP:
+        if self.server is not None and time.monotonic() - self.last_used > SMTP_IDLE_TIMEOUT:
+            self._disconnect()
+        if self.server is None:
+            self.server = _connect()
+        return self.server
+
+    def _disconnect(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    def _throttle(self) -> None:
+        wait = self.last_sent + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_sent = time.monotonic()
+
+    def _claim(self, conn: sqlite3.Connection) -> List[sqlite3.Row]:
+        """Claims due messages, and ones whose sender's lease has run out. Another
+        sender's live claims are left alone, so several senders can share the outbox."""
+        now = time.time()
+        rows = conn.execute("""
+            UPDATE email_outbox SET status = 'sending', claimed_at = :now
+            WHERE id IN (
+                SELECT id FROM email_outbox
+                WHERE (status = 'pending' AND next_attempt_at <= :now)
+                   OR (status = 'sending' AND COALESCE(claimed_at, 0) < :expired)
+                ORDER BY next_attempt_at LIMIT :limit
+            )
+            RETURNING id, recipient, subject, body, attempts
+        """, {'now': now, 'expired': now - self.lease_seconds, 'limit': self.batch_size}).fetchall()
+        conn.commit()
+        return rows
+
+    def _deliver(self, message: sqlite3.Row) -> None:
+        mime = _build_message(message['recipient'], message['subject'], message['body']).as_string()
+        self._throttle()
+        with metrics.stage("email_send"):
+            try:
+                self._server().sendmail(EMAIL_SENDER, [message['recipient']], mime)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # The server closed the reused connection; reconnect once and retry
+                self._disconnect()
+                self._server().sendmail(EMAIL_SENDER, [message['recipient']], mime)
+        self.last_used = time.monotonic()
+
+    def send_batch(self, conn: sqlite3.Connection) -> int:
+        """Sends every due message in one batch. Returns how many were claimed."""
+        batch = self._claim(conn)
+        for message in batch:
+            try:
+                self._deliver(message)
+            except Exception as e:
+                attempts = message['attempts'] + 1
+                status = 'failed' if attempts >= self.max_attempts else 'pending'
+                retry_at = time.time() + self.backoff_seconds * 2 ** (attempts - 1)
+                conn.execute("""
+                    UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?
+                    WHERE id = ?
+                """, (status, attempts, retry_at, str(e), message['id']))
+                logging.error(f"Email {message['id']} to {message['recipient']} failed (attempt {attempts}): {e}")
+                if isinstance(e, (smtplib.SMTPException, OSError)):
+                    self._disconnect()
+            else:
+                conn.execute("UPDATE email_outbox SET status = 'sent', attempts = attempts + 1, sent_at = ? WHERE id = ?",
+                             (time.time(), message['id']))
+            conn.commit()
+        return len(batch)
+
+    def run(self) -> None:
+        if _credentials_missing():
+            print("Error: Email credentials are not set in the environment. Outbox sender not started.")
+            return
+        conn = db.connect(self.db_path)
+        init_outbox(conn)
+        metrics.init_metrics(conn)
+        flusher = metrics.Flusher()
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    sent = self.send_batch(conn)
+                    flusher.maybe_flush(conn)
+                except Exception as e:
+                    # Say the database stays locked past busy_timeout: keep the sender alive and
+                    # try again after a pause. Messages it had claimed come back once their lease runs out.
+                    logging.exception(f"Outbox sender error: {e}")
+                    try:
+                        conn.rollback()
+                    except sqlite3.Error:
+                        pass
+                    self._disconnect()
+                    sent = 0
+                if not sent:
+                    if self.server is not None and time.monotonic() - self.last_used > SMTP_IDLE_TIMEOUT:
+                        self._disconnect()
+                    self.stop_event.wait(self.poll_interval)
+        finally:
+            self._disconnect()
+            metrics.flush_stages(conn)
+            conn.close()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+def start_outbox_sender(db_path: str = DB_PATH) -> OutboxSender:
+    """Runs an OutboxSender on a daemon thread and returns it."""
+    sender = OutboxSender(db_path)
+    threading.Thread(target=sender.run, name="outbox-sender", daemon=True).start()
+    return sender
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    print(f"Sending queued email from {db_path}. Press CTRL+C to stop.")
+    try:
+        OutboxSender(db_path).run()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,325 @@
+import os
+import time
+import random
+import bisect
+import sqlite3
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds, Prometheus style; a final +Inf bucket is implied
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Fraction of requests / jobs whose stages are timed. Request counts and
+# latencies are always recorded; only the per-stage breakdown is sampled.
+SAMPLE_RATE = float(os.environ.get('ATS_METRICS_SAMPLE_RATE', '1.0'))
+# Per-request cProfile: 'off', 'header' (requests sending X-Profile: 1) or 'all'
+PROFILE_MODE = os.environ.get('ATS_PROFILE', 'off')
+PROFILE_DIR = os.environ.get('ATS_PROFILE_DIR', 'profiles')
+PROFILE_HEADER = 'X-Profile'
+# How often long-running processes (web workers included) add their timings and
+# request counts to the shared tables; a process that is killed loses at most this much
+FLUSH_INTERVAL = 5.0
+
+class Histogram:
+    """Bucketed observations with a running sum. Not thread-safe on its own; the registry locks."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def merge(self, other: 'Histogram') -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+
+_lock = threading.Lock()
+# Observations not yet flushed to the database:
+# stage name -> histogram
+_stages: Dict[str, Histogram] = {}
+# (method, route) -> latency histogram; (method, route, status) -> count
+_route_latency: Dict[Tuple[str, str], Histogram] = {}
+_route_requests: Dict[Tuple[str, str, int], int] = {}
+_sampled: contextvars.ContextVar = contextvars.ContextVar('metrics_sampled', default=None)
+
+def init_metrics(conn: sqlite3.Connection) -> None:
+    """Tables where every process (web workers, job workers, outbox sender) adds up its
+    stage timings and request metrics."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS metric_stage_buckets (
+        stage TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (stage, bucket)
+    );
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS metric_stage_totals (
+        stage TEXT PRIMARY KEY,
+        count INTEGER NOT NULL,
+        sum REAL NOT NULL
+    );
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS metric_request_buckets (
+        method TEXT NOT NULL,
+        route TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (method, route, bucket)
+    );
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS metric_request_totals (
+        method TEXT NOT NULL,
+        route TEXT NOT NULL,
+        sum REAL NOT NULL,
+        PRIMARY KEY (method, route)
+    );
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS metric_requests (
+        method TEXT NOT NULL,
+        route TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (method, route, status)
+    );
+    ''')
+    conn.commit()
+
+# --- Stage timers ---
+
+def _sample() -> bool:
+    return SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE
+
+@contextmanager
+def sampling() -> Iterator[bool]:
+    """Decides once whether the stages of one unit of work (a request, a job) are timed,
+    so a sampled unit has all of its stages recorded."""
+    token = _sampled.set(_sample())
+    try:
+        yield _sampled.get()
+    finally:
+        _sampled.reset(token)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Times the block as stage `name`, if the current unit of work is sampled."""
+    sampled = _sampled.get()
+    if not (_sample() if sampled is None else sampled):
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+def observe_stage(name: str, seconds: float) -> None:
+    with _lock:
+        histogram = _stages.get(name)
+        if histogram is None:
+            histogram = _stages[name] = Histogram()
+        histogram.observe(seconds)
+
+def flush_stages(conn: sqlite3.Connection) -> None:
+    """Adds this process's stage timings and request metrics to the shared tables and resets them."""
+    with _lock:
+        stages, latency, requests = dict(_stages), dict(_route_latency), dict(_route_requests)
+        _stages.clear()
+        _route_latency.clear()
+        _route_requests.clear()
+    if not (stages or latency or requests):
+        return
+    try:
+        conn.executemany("""
+            INSERT INTO metric_stage_buckets (stage, bucket, count) VALUES (?, ?, ?)
+            ON CONFLICT (stage, bucket) DO UPDATE SET count = count + excluded.count
+        """, [(name, bucket, count) for name, histogram in stages.items()
+              for bucket, count in enumerate(histogram.counts) if count])
+        conn.executemany("""
+            INSERT INTO metric_stage_totals (stage, count, sum) VALUES (?, ?, ?)
+            ON CONFLICT (stage) DO UPDATE SET count = count + excluded.count, sum = sum + excluded.sum
+        """, [(name, histogram.count, histogram.sum) for name, histogram in stages.items()])
+        conn.executemany("""
+            INSERT INTO metric_request_buckets (method, route, bucket, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT (method, route, bucket) DO UPDATE SET count = count + excluded.count
+        """, [(method, route, bucket, count) for (method, route), histogram in latency.items()
+              for bucket, count in enumerate(histogram.counts) if count])
+        conn.executemany("""
+            INSERT INTO metric_request_totals (method, route, sum) VALUES (?, ?, ?)
+            ON CONFLICT (method, route) DO UPDATE SET sum = sum + excluded.sum
+        """, [(method, route, histogram.sum) for (method, route), histogram in latency.items()])
+        conn.executemany("""
+            INSERT INTO metric_requests (method, route, status, count) VALUES (?, ?, ?, ?)
+            ON CONFLICT (method, route, status) DO UPDATE SET count = count + excluded.count
+        """, [(method, route, status, count) for (method, route, status), count in requests.items()])
+        conn.commit()
+    except sqlite3.Error as e:
+        # Metrics must never break the work they measure; keep the observations for next time
+        conn.rollback()
+        logging.warning(f"Could not flush metrics: {e}")
+        with _lock:
+            for name, histogram in stages.items():
+                _stages.setdefault(name, Histogram()).merge(histogram)
+            for key, histogram in latency.items():
+                _route_latency.setdefault(key, Histogram()).merge(histogram)
+            for key, count in requests.items():
+                _route_requests[key] = _route_requests.get(key, 0) + count
+
+class Flusher:
+    """Calls flush_stages at most every FLUSH_INTERVAL seconds, for worker loops and web processes."""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def due(self) -> bool:
+        """True (once) when a flush is due."""
+        now = time.monotonic()
+        if now - self.last < self.interval:
+            return False
+        self.last = now
+        return True
+
+    def maybe_flush(self, conn: sqlite3.Connection) -> None:
+        if self.due():
+            flush_stages(conn)
+
+def _stored_stages(conn: sqlite3.Connection) -> Dict[str, Histogram]:
+    stages: Dict[str, Histogram] = {}
+    for name, bucket, count in conn.execute("SELECT stage, bucket, count FROM metric_stage_buckets"):
+        stages.setdefault(name, Histogram()).counts[bucket] = count
+    for name, _, total in conn.execute("SELECT stage, count, sum FROM metric_stage_totals"):
+        stages.setdefault(name, Histogram()).sum = total
+    return stages
+
+def _stored_requests(conn: sqlite3.Connection) -> Tuple[Dict[Tuple[str, str], Histogram], Dict[Tuple[str, str, int], int]]:
+    latency: Dict[Tuple[str, str], Histogram] = {}
+    for method, route, bucket, count in conn.execute("SELECT method, route, bucket, count FROM metric_request_buckets"):
+        latency.setdefault((method, route), Histogram()).counts[bucket] = count
+    for method, route, total in conn.execute("SELECT method, route, sum FROM metric_request_totals"):
+        latency.setdefault((method, route), Histogram()).sum = total
+    requests = {(method, route, status): count for method, route, status, count in
+                conn.execute("SELECT method, route, status, count FROM metric_requests")}
+    return latency, requests
+
+# --- Routes ---
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    with _lock:
+        histogram = _route_latency.get((method, route))
+        if histogram is None:
+            histogram = _route_latency[(method, route)] = Histogram()
+        histogram.observe(seconds)
+        key = (method, route, status)
+        _route_requests[key] = _route_requests.get(key, 0) + 1
+
+def _profile_path(method: str, route: str) -> str:
+    safe_route = ''.join(ch if ch.isalnum() else '_' for ch in route).strip('_') or 'root'
+    return os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**6:06d}-{method}-{safe_route}.prof")
+
+def init_app(app) -> None:
+    """Times every request and, when profiling is on, dumps a cProfile per request.
+    Each web process adds its figures to the shared tables every FLUSH_INTERVAL seconds,
+    so /metrics covers every gunicorn worker, not just the one serving the scrape."""
+    from flask import g, request
+    import db
+
+    app.config.setdefault('PROFILE_MODE', PROFILE_MODE)
+    flusher = Flusher()
+
+    @app.before_request
+    def _start_request():
+        g.metrics_start = time.perf_counter()
+        g.metrics_sampled = _sampled.set(_sample())
+        mode = app.config['PROFILE_MODE']
+        if mode == 'all' or (mode == 'header' and request.headers.get(PROFILE_HEADER) == '1'):
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.metrics_profiler = profiler
+            except ValueError:
+                pass  # another profiler is already active on this thread
+
+    @app.after_request
+    def _finish_request(response):
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = _profile_path(request.method, route)
+            profiler.dump_stats(path)
+            response.headers['X-Profile-Path'] = path
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            observe_request(request.method, route, response.status_code, time.perf_counter() - start)
+        if flusher.due():
+            # Its own connection: the request's may still hold uncommitted work
+            conn = db.connect(app.config['DATABASE'])
+            try:
+                flush_stages(conn)
+            finally:
+                conn.close()
+        return response
+
+    @app.teardown_request
+    def _end_sampling(exc=None):
+        token = g.pop('metrics_sampled', None)
+        if token is not None:
+            _sampled.reset(token)
+
+# --- Exposition ---
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+def _histogram_lines(name: str, labels: Dict[str, str], histogram: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(BUCKETS + (float('inf'),), histogram.counts):
+        cumulative += count
+        le = '+Inf' if bound == float('inf') else repr(bound)
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return lines
+
+def render(conn: sqlite3.Connection, gauges: Optional[Dict[str, List[Tuple[Dict[str, str], float]]]] = None) -> str:
+    """Everything in Prometheus text format, from the shared tables, so it covers every
+    web worker, the job workers and the outbox sender (up to FLUSH_INTERVAL behind,
+    except for this process, which flushes first)."""
+    flush_stages(conn)
+    out = ["# HELP ats_stage_seconds Time spent in each processing stage (sampled).",
+           "# TYPE ats_stage_seconds histogram"]
+    for name, histogram in sorted(_stored_stages(conn).items()):
+        out += _histogram_lines('ats_stage_seconds', {'stage': name}, histogram)
+
+    latency, requests = _stored_requests(conn)
+    out += ["# HELP ats_http_requests_total Requests handled, by route and status.",
+            "# TYPE ats_http_requests_total counter"]
+    for (method, route, status), count in sorted(requests.items()):
+        out.append(f"ats_http_requests_total{_format_labels({'method': method, 'route': route, 'status': status})} {count}")
+    out += ["# HELP ats_http_request_duration_seconds Request latency, by route.",
+            "# TYPE ats_http_request_duration_seconds histogram"]
+    for (method, route), histogram in sorted(latency.items()):
+        out += _histogram_lines('ats_http_request_duration_seconds', {'method': method, 'route': route}, histogram)
+
+    for name, samples in (gauges or {}).items():
+        out.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            out.append(f"{name}{_format_labels(labels) if labels else ''} {value}")
+    return '\n'.join(out) + '\n'
@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Dict, Optional, Tuple
+
+# Eviction limits; entries are dropped by age first, then least recently used
+MAX_ENTRIES = int(os.environ.get('ATS_PARSE_CACHE_MAX_ENTRIES', '10000'))
+MAX_BYTES = int(os.environ.get('ATS_PARSE_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+MAX_AGE = float(os.environ.get('ATS_PARSE_CACHE_MAX_AGE_DAYS', '30')) * 86400
+# Eviction scans the table, so only run it every this many insertions
+EVICT_EVERY = 50
+
+_puts_since_evict = 0
+
+def init_cache(conn: sqlite3.Connection) -> None:
+    """Creates the parse cache tables if they don't exist yet."""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS parse_cache (
+        content_hash TEXT NOT NULL,
+        version TEXT NOT NULL,
+        resume_text TEXT,
+        result TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_used_at REAL NOT NULL,
+        PRIMARY KEY (content_hash, version)
+    );
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_last_used ON parse_cache (last_used_at)")
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS parse_cache_stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    );
+    ''')
+    conn.commit()
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _count(conn: sqlite3.Connection, name: str) -> None:
+    conn.execute("""
+        INSERT INTO parse_cache_stats (name, value) VALUES (?, 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1
+    """, (name,))
+
+def get(conn: sqlite3.Connection, digest: str, version: str) -> Optional[Tuple[str, Dict]]:
+    """Returns (resume_text, parse result) for a previously parsed file, or None."""
+    row = conn.execute("SELECT resume_text, result, created_at FROM parse_cache WHERE content_hash = ? AND version = ?",
+                       (digest, version)).fetchone()
+    now = time.time()
+    if row is None or now - row[2] > MAX_AGE:
+        _count(conn, 'misses')
+        conn.commit()
+        return None
+    conn.execute("UPDATE parse_cache SET last_used_at = ? WHERE content_hash = ? AND version = ?",
+                 (now, digest, version))
+    _count(conn, 'hits')
+    conn.commit()
+    return row[0], json.loads(row[1])
+
+def put(conn: sqlite3.Connection, digest: str, version: str, resume_text: str, result: Dict) -> None:
+    global _puts_since_evict
+    payload = json.dumps(result)
+    now = time.time()
+    conn.execute("""
+        INSERT OR REPLACE INTO parse_cache (content_hash, version, resume_text, result, size, created_at, last_used_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (digest, version, resume_text, payload, len(resume_text) + len(payload), now, now))
+    conn.commit()
+    _puts_since_evict += 1
+    if _puts_since_evict >= EVICT_EVERY:
+        evict(conn, version)
+
+def evict(conn: sqlite3.Connection, version: str) -> int:
+    """Drops entries from stale parser code or taxonomy, expired entries, then the least
+    recently used ones until the table is within MAX_ENTRIES and MAX_BYTES. Returns rows removed.
+
+    A version reads "<PARSER_VERSION>/<model>/taxonomy-<n>". Entries for another model
+    (the lean bulk-ingest parser next to the web one) are still current and are kept."""
+    global _puts_since_evict
+    _puts_since_evict = 0
+    removed = conn.execute("DELETE FROM parse_cache WHERE created_at < ?", (time.time() - MAX_AGE,)).rowcount
+    if version.count('/') >= 2:
+        prefix, suffix = version.split('/', 1)[0] + '/', '/' + version.rsplit('/', 1)[1]
+        removed += conn.execute("""
+            DELETE FROM parse_cache
+            WHERE substr(version, 1, length(:prefix)) != :prefix OR substr(version, -length(:suffix)) != :suffix
+        """, {'prefix': prefix, 'suffix': suffix}).rowcount
+    count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parse_cache").fetchone()
+    if count > MAX_ENTRIES or total > MAX_BYTES:
+        # Walk from most to least recently used and cut where either limit is crossed
+        kept_entries = kept_bytes = 0
+        cutoff = None
+        for last_used_at, size in conn.execute("SELECT last_used_at, size FROM parse_cache ORDER BY last_used_at DESC"):
+            kept_entries += 1
+            kept_bytes += size
+            if kept_entries > MAX_ENTRIES or kept_bytes > MAX_BYTES:
+                cutoff = last_used_at
+                break
+        if cutoff is not None:
+            removed += conn.execute("DELETE FROM parse_cache WHERE last_used_at <= ?", (cutoff,)).rowcount
+    conn.commit()
+    return removed
+
+def stats(conn: sqlite3.Connection) -> Dict:
+    counters = dict(conn.execute("SELECT name, value FROM parse_cache_stats").fetchall())
+    count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parse_cache").fetchone()
+    hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+    return {
+        "entries": count,
+        "bytes": total,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+    }
@@ -0,0 +1,285 @@
+import re
+import math
+import sqlite3
+import threading
+from collections import Counter
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from skill_matcher import Taxonomy, load_taxonomy
+from skill_index import split_skills
+from change_feed import changes_since
+
+DEFAULT_TOP_K = 20
+MAX_TOP_K = 500
+# Relative weight of each signal in the final score; each signal is in [0, 1]
+WEIGHTS = {'skills': 0.6, 'summary': 0.3, 'experience': 0.1}
+# Rows read per query when loading or syncing from the database
+SYNC_BATCH_SIZE = 2000
+# Rebuild the matrices once this fraction of rows belongs to removed or replaced candidates
+COMPACT_RATIO = 0.25
+RANK_COLUMNS = ['id', 'skills', 'total_experience_years', 'experience_summary']
+
+_TOKEN = re.compile(r"[a-z][a-z0-9+#]+")
+_YEARS = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+STOP_WORDS = frozenset("""
+    an and are as at be by for from has have in is it its of on or our that the their this to was were
+    will with we you your who which while within work worked working years year yrs role team
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOP_WORDS]
+
+def required_years(job_description: str) -> Optional[float]:
+    """The largest 'N years' / 'N+ yrs' figure in a job description, if any."""
+    years = [float(match) for match in _YEARS.findall(job_description)]
+    return max(years) if years else None
+
+class RankingIndex:
+    """Candidates as rows of two sparse matrices, candidate-by-skill and
+    candidate-by-term (sublinear TF of experience_summary), plus an experience
+    vector. A job description is scored against every candidate with a couple
+    of sparse matrix-vector products.
+
+    New or changed candidates are appended as pending rows and stacked onto the
+    matrices on the next query; replaced and removed rows are masked out until
+    enough of them pile up to compact. Safe to share between threads."""
+
+    def __init__(self, taxonomy: Optional[Taxonomy] = None):
+        self.taxonomy = taxonomy or load_taxonomy()
+        self.lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.skill_vocab: Dict[str, int] = {}
+        self.term_vocab: Dict[str, int] = {}
+        self.skills = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.tf = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.tf_squared = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.experience = np.zeros(0, dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        # Document frequency per term over live candidates, kept up to date on add/remove
+        self.df = np.zeros(0, dtype=np.int64)
+        self.row_of: Dict[int, int] = {}
+        # (candidate_id, skill columns, term columns, term weights, experience) per row not yet stacked
+        self.pending: List[tuple] = []
+        self.revision = 0
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def _column(self, vocab: Dict[str, int], term: str) -> int:
+        column = vocab.get(term)
+        if column is None:
+            column = vocab[term] = len(vocab)
+        return column
+
+    def _row_terms(self, row: int) -> np.ndarray:
+        """Term columns of a stored or pending row."""
+        stored = self.tf.shape[0]
+        if row < stored:
+            return self.tf.indices[self.tf.indptr[row]:self.tf.indptr[row + 1]]
+        return self.pending[row - stored][2]
+
+    def add(self, candidate_id: int, skills: Sequence[str], total_experience_years: Optional[float],
+            experience_summary: Union[str, Sequence[str], None]) -> None:
+        """Adds or replaces a candidate, from ResumeParser.parse() output or a database row."""
+        if not isinstance(experience_summary, str):
+            experience_summary = '\n'.join(experience_summary or [])
+        with self.lock:
+            self.remove(candidate_id)
+            skill_columns = sorted({self._column(self.skill_vocab, skill.lower()) for skill in skills})
+            counts = sorted((self._column(self.term_vocab, token), count)
+                            for token, count in Counter(tokenize(experience_summary)).items())
+            term_columns = [column for column, _ in counts]
+            weights = [1 + math.log(count) for _, count in counts]
+            if len(self.df) < len(self.term_vocab):
+                # Grow geometrically so new terms don't copy the array every time
+                grown = np.zeros(max(len(self.term_vocab), 2 * len(self.df)), dtype=np.int64)
+                grown[:len(self.df)] = self.df
+                self.df = grown
+            self.df[term_columns] += 1
+            self.row_of[candidate_id] = self.tf.shape[0] + len(self.pending)
+            self.pending.append((candidate_id, skill_columns, term_columns, weights,
+                                 np.nan if total_experience_years is None else total_experience_years))
+
+    def remove(self, candidate_id: int) -> None:
+        with self.lock:
+            row = self.row_of.pop(candidate_id, None)
+            if row is None:
+                return
+            self.df[self._row_terms(row)] -= 1
+            if row < len(self.alive):
+                self.alive[row] = False
+            else:
+                # Empty the pending row but keep its slot so row numbers hold
+                self.pending[row - len(self.alive)] = (None, [], [], [], np.nan)
+
+    def _stack(self, matrix: sparse.csr_matrix, rows: List[List[int]], data: List[List[float]], width: int):
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(columns) for columns in rows])
+        block = sparse.csr_matrix((np.fromiter(chain.from_iterable(data), np.float32, indptr[-1]),
+                                   np.fromiter(chain.from_iterable(rows), np.int32, indptr[-1]), indptr),
+                                  shape=(len(rows), width))
+        # Terms and skills seen since the last flush widen the existing rows
+        matrix.resize((matrix.shape[0], width))
+        return sparse.vstack([matrix, block], format='csr'), block
+
+    def _flush(self) -> None:
+        """Stacks pending rows onto the matrices, compacting first if too many rows are dead."""
+        if len(self.alive) and (len(self.alive) - self.alive.sum()) / len(self.alive) > COMPACT_RATIO:
+            self._compact()
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        ids = np.array([-1 if row[0] is None else row[0] for row in pending], dtype=np.int64)
+        self.skills, _ = self._stack(self.skills, [row[1] for row in pending],
+                                     [[1.0] * len(row[1]) for row in pending], len(self.skill_vocab))
+        self.tf, block = self._stack(self.tf, [row[2] for row in pending], [row[3] for row in pending],
+                                     len(self.term_vocab))
+        self.tf_squared.resize((self.tf_squared.shape[0], len(self.term_vocab)))
+        self.tf_squared = sparse.vstack([self.tf_squared, block.multiply(block)], format='csr')
+        self.experience = np.concatenate([self.experience, np.array([row[4] for row in pending], np.float32)])
+        self.ids = np.concatenate([self.ids, ids])
+        self.alive = np.concatenate([self.alive, ids >= 0])
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self.alive)
+        self.skills = self.skills[keep]
+        self.tf = self.tf[keep]
+        self.tf_squared = self.tf.multiply(self.tf).tocsr()
+        self.experience = self.experience[keep]
+        self.ids = self.ids[keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.row_of = {int(candidate_id): row for row, candidate_id in enumerate(self.ids)}
+        # Pending rows shift down along with the stored ones
+        for offset, entry in enumerate(self.pending):
+            if entry[0] is not None:
+                self.row_of[entry[0]] = len(keep) + offset
+
+    def resolve_skills(self, names: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Splits requested skill names into the (lowercased) names to score against, with
+        aliases mapped onto the taxonomy as /match does ('Postgres' is postgresql), and the
+        names that neither the taxonomy nor any candidate's skills know."""
+        resolved: Dict[str, None] = {}
+        unknown: List[str] = []
+        with self.lock:
+            for name in names:
+                found = self.taxonomy.skills.find(name)
+                if not found and name.strip().lower() in self.skill_vocab:
+                    found = [name.strip()]
+                if not found:
+                    unknown.append(name.strip())
+                for skill in found:
+                    resolved[skill.lower()] = None
+        return list(resolved), unknown
+
+    def scores(self, job_description: str, required_skills: Optional[Sequence[str]] = None,
+               min_experience: Optional[float] = None, weights: Dict[str, float] = WEIGHTS) -> Dict[str, np.ndarray]:
+        """Per-signal and total scores for every row, aligned with self.ids.
+        Skills default to the taxonomy skills named in the job description, and the
+        experience requirement to the largest 'N years' it mentions. Unknown skills
+        (see resolve_skills) are left out rather than counted as missing."""
+        with self.lock:
+            self._flush()
+            rows = len(self.ids)
+            if required_skills is None:
+                required_skills = self.taxonomy.skills.find(job_description)
+            required_skills, _ = self.resolve_skills(required_skills)
+            if min_experience is None:
+                min_experience = required_years(job_description)
+
+            skill_score = np.zeros(rows, dtype=np.float32)
+            columns = [self.skill_vocab[skill] for skill in required_skills if skill in self.skill_vocab]
+            if columns and rows:
+                wanted = np.zeros(self.skills.shape[1], dtype=np.float32)
+                wanted[columns] = 1
+                skill_score = self.skills @ wanted / len(required_skills)
+
+            summary_score = np.zeros(rows, dtype=np.float32)
+            counts = Counter(self.term_vocab[token] for token in tokenize(job_description) if token in self.term_vocab)
+            if counts and rows:
+                live = len(self.row_of)
+                df = self.df[:self.tf.shape[1]]
+                idf = (np.log((1 + live) / (1 + df)) + 1).astype(np.float32)
+                query = np.zeros(self.tf.shape[1], dtype=np.float32)
+                for column, count in counts.items():
+                    query[column] = (1 + math.log(count)) * idf[column]
+                query /= np.linalg.norm(query)
+                # Cosine similarity of idf-weighted vectors, without materialising them
+                norms = np.sqrt(self.tf_squared @ (idf * idf))
+                dots = self.tf @ (idf * query)
+                summary_score = np.divide(dots, norms, out=np.zeros(rows, dtype=np.float32), where=norms > 0)
+
+            experience_score = np.zeros(rows, dtype=np.float32)
+            if min_experience:
+                experience_score = np.nan_to_num(np.minimum(self.experience / min_experience, 1.0), nan=0.0)
+
+            total = (weights.get('skills', 0) * skill_score + weights.get('summary', 0) * summary_score
+                     + weights.get('experience', 0) * experience_score)
+            total = np.where(self.alive, total, -np.inf)
+            return {'total': total, 'skills': skill_score, 'summary': summary_score,
+                    'experience': experience_score, 'ids': self.ids}
+
+    def top_k(self, job_description: str, k: int = DEFAULT_TOP_K, **kwargs) -> List[Dict]:
+        """The k best candidates for a job description, best first, with per-signal scores."""
+        k = max(1, min(int(k), MAX_TOP_K))
+        scored = self.scores(job_description, **kwargs)
+        total = scored['total']
+        k = min(k, len(self))
+        if k == 0:
+            return []
+        # argpartition finds the top k in linear time; only those k get sorted
+        best = np.argpartition(-total, k - 1)[:k]
+        best = best[np.argsort(-total[best], kind='stable')]
+        return [{
+            'id': int(scored['ids'][row]),
+            'score': round(float(total[row]), 4),
+            'skills_score': round(float(scored['skills'][row]), 4),
+            'summary_score': round(float(scored['summary'][row]), 4),
+            'experience_score': round(float(scored['experience'][row]), 4),
+        } for row in best]
+
+    # --- Keeping in step with the database ---
+
+    def _add_row(self, row) -> None:
+        self.add(row['id'], split_skills(row['skills']), row['total_experience_years'], row['experience_summary'])
+
+    def load(self, conn: sqlite3.Connection, revision: int) -> None:
+        """Indexes every candidate, in batches; `revision` is the change feed position it reflects."""
+        with self.lock:
+            self._reset()
+            last_id = 0
+            while True:
+                rows = conn.execute(f"""
+                    SELECT {', '.join(RANK_COLUMNS)} FROM candidates WHERE id > ? ORDER BY id LIMIT ?
+                """, (last_id, SYNC_BATCH_SIZE)).fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    self._add_row(row)
+                last_id = rows[-1]['id']
+            self.revision = revision
+
+    def sync(self, conn: sqlite3.Connection) -> None:
+        """Applies candidate changes since the last sync from the change feed. The first
+        sync, or one whose position was pruned from the change log, loads everything."""
+        conn.row_factory = sqlite3.Row
+        with self.lock:
+            while True:
+                changes = changes_since(conn, self.revision, SYNC_BATCH_SIZE, RANK_COLUMNS) if self.revision else None
+                if changes is None:
+                    revision = conn.execute("SELECT COALESCE(MAX(revision), 0) FROM candidate_changes").fetchone()[0]
+                    self.load(conn, revision)
+                    return
+                for row in changes['changed']:
+                    self._add_row(row)
+                for candidate_id in changes['deleted']:
+                    self.remove(candidate_id)
+                self.revision = changes['cursor']
+                if not changes['has_more']:
+                    return
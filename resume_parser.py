@@ -1,43 +1,236 @@
-import spacy
 import re
+import bisect
 import json
 import sys
 import os
-import PyPDF2
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Generator, Iterable, Iterator, List, Optional, Tuple, Union
+from datetime import date
+from functools import lru_cache
+from skill_matcher import load_taxonomy
+from metrics import stage
 
 # --- Setup Logging ---
 logging.basicConfig(filename='resume_parser.log', level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+DEFAULT_MODEL = "en_core_web_sm"
+# Bump whenever extraction or parsing logic changes so cached results are invalidated
+PARSER_VERSION = "7"
+# Only NER (extract_name) and sentence boundaries (extract_experience) are used.
+# The lean pipeline drops everything else and segments sentences with the
+# rule-based sentencizer instead of the dependency parser.
+UNUSED_COMPONENTS = ["tagger", "attribute_ruler", "lemmatizer", "parser", "morphologizer", "senter"]
+LEAN_PIPELINE = os.environ.get('ATS_LEAN_PIPELINE', '0') == '1'
+
+# --- PDF extraction limits ---
+# A resume has no business being longer than this; the rest of a longer file is ignored
+MAX_PDF_PAGES = int(os.environ.get('ATS_MAX_PDF_PAGES', '20'))
+# Larger files are refused outright, since PyPDF2 parses the whole file up front
+MAX_PDF_BYTES = int(os.environ.get('ATS_MAX_PDF_BYTES', str(10 * 1024 * 1024)))
+# Seconds of extraction per file. Only checked between pages: it doesn't bound opening
+# the file (which MAX_PDF_BYTES does) or a single slow page, so it is no substitute
+# for the worker being killed and the job requeued
+PDF_TIME_BUDGET = float(os.environ.get('ATS_PDF_TIME_BUDGET', '10'))
+# Stop reading once the education, experience and skills sections have each been
+# followed by another heading. Off by default: a resume whose headings don't match
+# SECTION_HEADINGS is read to the end either way, but one that is misread loses pages.
+PDF_STOP_EARLY = os.environ.get('ATS_PDF_STOP_EARLY', '0') == '1'
+# Whole-line headings of the sections the parser uses, and of the sections that
+# typically follow them (which is how a section is known to have ended)
+SECTION_HEADINGS = {
+    'education': ('education', 'educational background', 'academic background', 'academics',
+                  'academic qualifications', 'qualifications', 'education and qualifications'),
+    'experience': ('experience', 'work experience', 'professional experience', 'relevant experience',
+                   'employment', 'employment history', 'work history', 'career history'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core competencies', 'technologies'),
+}
+OTHER_HEADINGS = ('summary', 'profile', 'objective', 'career objective', 'projects', 'personal projects',
+                  'academic projects', 'certifications', 'certificates', 'courses', 'training', 'achievements',
+                  'awards', 'honors', 'publications', 'languages', 'interests', 'hobbies', 'activities',
+                  'extracurricular activities', 'volunteering', 'references')
+_HEADING_SECTION = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+_HEADING_SECTION.update((heading, None) for heading in OTHER_HEADINGS)
+_LONGEST_HEADING = max(map(len, _HEADING_SECTION))
+
+def _headings(text: str) -> Iterator[Tuple[int, Optional[str]]]:
+    """(offset, section) of each heading line in `text`; section is None for OTHER_HEADINGS.
+    A dict lookup per short line is several times cheaper than a multiline regex scan."""
+    offset = 0
+    for line in text.split('\n'):
+        if len(line) <= _LONGEST_HEADING + 8:
+            key = line.strip().rstrip(':').rstrip().lower()
+            if key in _HEADING_SECTION:
+                yield offset, _HEADING_SECTION[key]
+        offset += len(line) + 1
+
+# --- Experience date ranges ---
+# "Mar 2019", "03/2019" or "2019", then a dash or "to", then another date or an
+# open end ("Present", "Current", "Now", "to date", "till date")
+_MONTH_NAME = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+_DATE_TOKEN = rf'(?:{_MONTH_NAME},?\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})\b'
+# Anchored on the start year: a literal "19"/"20" prefix lets Python's regex engine
+# skip ahead quickly, where a leading month-name alternation is tried at every
+# position. The month before the year is matched separately by _START_MONTH.
+# Neither year may be part of a longer run of digits ("555-2019-2020", "9001:2015");
+# the start is checked after matching, as a lookbehind would cancel the fast skip.
+EXPERIENCE_RANGE = re.compile(
+    rf'((?:19|20)\d\d)[^\S\n]*(?:-|\u2013|\u2014|to\b|till\b|until\b)[^\S\n]*'
+    rf'(?:({_DATE_TOKEN})(?![\-:/.]?\d)|(present|current|now|(?:to\s+|till\s+)?date)\b)',
+    re.IGNORECASE)
+_START_MONTH = re.compile(rf'\b(?:{_MONTH_NAME},?\s+|\d{{1,2}}/)\Z', re.IGNORECASE)
+_START_MONTH_WINDOW = 16
+_NOT_BEFORE_YEAR = frozenset('0123456789:.-')
+_DATE_PARTS = re.compile(r'([a-z]{3})[a-z]*\.?,?\s+(\d{4})|(\d{1,2})/(\d{4})|(\d{4})')
+_MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'))}
+_YEARS = range(1950, 2100)
+
+@lru_cache(maxsize=4096)
+def _month_ordinal(token: str) -> Optional[int]:
+    """A date token as months since year 0 (year * 12 + month - 1), or None if it isn't a
+    plausible date. Resumes repeat the same few dozen tokens, so results are memoized."""
+    match = _DATE_PARTS.fullmatch(token.lower())
+    if match is None:
+        return None
+    month_name, named_year, month_number, numbered_year, bare_year = match.groups()
+    if month_name is not None:
+        month, year = _MONTHS.get(month_name), int(named_year)
+    elif month_number is not None:
+        month, year = int(month_number) - 1, int(numbered_year)
+        if not 0 <= month < 12:
+            return None
+    else:
+        month, year = 0, int(bare_year)
+    if month is None or year not in _YEARS:
+        return None
+    return year * 12 + month
+
+def _union_months(intervals: List[Tuple[int, int]]) -> int:
+    """Total length of the union of [start, end) month intervals."""
+    total = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+class PdfTooLarge(ValueError):
+    """The PDF is bigger than MAX_PDF_BYTES."""
+
+# spaCy and PyPDF2 take seconds to import, so they are imported where they're
+# first used; importing this module (and app.py) stays cheap for code that
+# never parses a resume.
+
 class ResumeParser:
-    def __init__(self):
+    def __init__(self, model: str = DEFAULT_MODEL, lean: bool = False, taxonomy_path: Optional[str] = None):
+        import spacy
+
+        self.taxonomy = load_taxonomy(taxonomy_path)
+        self.cache_version = f"{PARSER_VERSION}/{model}{'-lean' if lean else ''}/taxonomy-{self.taxonomy.version}"
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            if lean:
+                self.nlp = spacy.load(model, exclude=UNUSED_COMPONENTS)
+                if not any(name in self.nlp.pipe_names for name in ("parser", "senter", "sentencizer")):
+                    self.nlp.add_pipe("sentencizer", first=True)
+            else:
+                self.nlp = spacy.load(model)
         except OSError:
-            error_msg = "Spacy model 'en_core_web_sm' not found. Install it with: python -m spacy download en_core_web_sm"
+            error_msg = f"Spacy model '{model}' not found. Install it with: python -m spacy download {model}"
             logging.error(error_msg)
             raise Exception(error_msg)
 
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    @staticmethod
+    def extract_text_from_pdf(pdf_path: Union[str, BinaryIO], max_pages: int = MAX_PDF_PAGES,
+                              max_bytes: int = MAX_PDF_BYTES, time_budget: float = PDF_TIME_BUDGET,
+                              stop_early: bool = PDF_STOP_EARLY) -> str:
+        """Extracts text from a PDF given its path or an open binary file object.
+        Doesn't touch the spaCy model, so it is safe to call from extraction-only worker processes."""
+        return ResumeParser.extract_pdf(pdf_path, max_pages, max_bytes, time_budget, stop_early)[0]
+
+    @staticmethod
+    def extract_pdf(pdf_path: Union[str, BinaryIO], max_pages: int = MAX_PDF_PAGES, max_bytes: int = MAX_PDF_BYTES,
+                    time_budget: float = PDF_TIME_BUDGET, stop_early: bool = PDF_STOP_EARLY) -> Tuple[str, bool]:
+        """Like extract_text_from_pdf, but returns (text, truncated); `truncated` is True when
+        the page limit or the time budget cut the file short. Such text must not be cached
+        under the file's hash, since another attempt may well read all of it."""
         try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                return text
+            with stage("pdf_extract"):
+                if hasattr(pdf_path, 'read'):
+                    return ResumeParser._read_pages(pdf_path, max_pages, max_bytes, time_budget, stop_early)
+                with open(pdf_path, 'rb') as file:
+                    return ResumeParser._read_pages(file, max_pages, max_bytes, time_budget, stop_early)
         except FileNotFoundError:
             logging.error(f"File not found: {pdf_path}")
             raise FileNotFoundError(f"Error: File not found: {pdf_path}")
+        except PdfTooLarge as e:
+            logging.error(f"Refused PDF {pdf_path}: {e}")
+            raise
         except Exception as e:
             logging.error(f"Error reading PDF {pdf_path}: {e}")
             raise Exception(f"Error reading PDF: {e}")
 
+    @staticmethod
+    def _read_pages(file: BinaryIO, *limits) -> Tuple[str, bool]:
+        pages = ResumeParser.iter_pdf_pages(file, *limits)
+        texts = []
+        while True:
+            try:
+                texts.append(next(pages))
+            except StopIteration as stop:
+                return "\n".join(texts), bool(stop.value)
+
+    @staticmethod
+    def iter_pdf_pages(file: BinaryIO, max_pages: int = MAX_PDF_PAGES, max_bytes: int = MAX_PDF_BYTES,
+                       time_budget: float = PDF_TIME_BUDGET, stop_early: bool = PDF_STOP_EARLY) -> Generator[str, None, bool]:
+        """Yields the text of each non-empty page, stopping at `max_pages`, when `time_budget`
+        seconds have passed, or with `stop_early` once every needed section has ended.
+        The generator returns True if the page limit or time budget cut the file short.
+        The budget is checked between pages, so opening the file and the page being read
+        when it runs out aren't bounded by it. Raises PdfTooLarge before parsing a file
+        bigger than `max_bytes`."""
+        import PyPDF2
+
+        start = time.monotonic()
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END) - position
+        file.seek(position)
+        if size > max_bytes:
+            raise PdfTooLarge(f"PDF is {size} bytes, the limit is {max_bytes}")
+
+        reader = PyPDF2.PdfReader(file)
+        # Needed sections that a later heading has closed, and the section being read
+        closed, current = set(), None
+        for number, page in enumerate(reader.pages):
+            if number >= max_pages:
+                logging.warning(f"PDF has {len(reader.pages)} pages; only the first {max_pages} were read")
+                return True
+            if time.monotonic() - start > time_budget:
+                logging.warning(f"PDF extraction stopped after {number} pages: over the {time_budget}s budget")
+                return True
+            page_text = page.extract_text()
+            if not page_text:
+                continue
+            yield page_text
+            if stop_early:
+                for _, section in _headings(page_text):
+                    if current is not None:
+                        closed.add(current)
+                    current = section
+                    # A section can be continued under a repeated heading
+                    closed.discard(current)
+                if closed.issuperset(SECTION_HEADINGS):
+                    return False
+        return False
+
     def extract_name(self, doc) -> Optional[str]:
         for ent in doc.ents:
             if ent.label_ == "PERSON":
@@ -56,73 +249,127 @@ class ResumeParser:
         return match.group(0) if match else None
 
     def extract_education(self, text: str) -> List[str]:
-        qualifications = ['MCA', 'MCS', 'ME', 'BE', 'B.E.', 'B.Tech', 'M.Tech', 'BCA', 'BSc', 'MSc']
-        found_education = []
-        for qual in qualifications:
-            pattern = r'\b' + re.escape(qual) + r'(?![a-zA-Z])'
-            if re.search(pattern, text, re.IGNORECASE):
-                found_education.append(qual.replace('.', ''))
-        return list(set(found_education)) if found_education else ["No specific qualifications found"]
+        found_education = self.taxonomy.qualifications.find(text)
+        return found_education if found_education else ["No specific qualifications found"]
 
     def calculate_total_experience(self, text: str) -> float:
-        date_pattern = re.compile(
-            r'(\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?,?\s+\d{4})\s*-\s*(\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?,?\s+\d{4}|\bPresent\b)',
-            re.IGNORECASE
-        )
-        matches = date_pattern.findall(text)
-        total_months = 0
-
-        for start_date_str, end_date_str in matches:
-            try:
-                start_date = datetime.strptime(start_date_str.replace('.', '').replace(',', ''), '%b %Y')
-                
-                if 'Present' in end_date_str:
-                    end_date = datetime.now()
-                else:
-                    end_date = datetime.strptime(end_date_str.replace('.', '').replace(',', ''), '%b %Y')
-
-                if start_date < end_date:
-                    total_months += (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-            except ValueError:
+        """Years covered by the date ranges in `text`, counting overlapping roles once.
+        With an Experience heading only ranges under it count, otherwise ranges under an
+        Education heading are skipped; ranges on a line naming a qualification never count."""
+        today = date.today()
+        now = today.year * 12 + today.month - 1
+        headings = list(_headings(text))
+        section_starts = [offset for offset, _ in headings]
+        sections = [section for _, section in headings]
+        has_experience = 'experience' in sections
+        intervals = []
+        for match in EXPERIENCE_RANGE.finditer(text):
+            range_start = match.start()
+            if range_start and text[range_start - 1] in _NOT_BEFORE_YEAR:
                 continue
-
-        return round(total_months / 12, 1)
+            at = bisect.bisect_right(section_starts, range_start) - 1
+            section = sections[at] if at >= 0 else None
+            if (has_experience and section != 'experience') or section == 'education':
+                continue
+            month = _START_MONTH.search(text, max(0, range_start - _START_MONTH_WINDOW), range_start)
+            if month is not None:
+                range_start = month.start()
+            start = _month_ordinal(text[range_start:match.end(1)])
+            end = now if match.group(3) else _month_ordinal(match.group(2))
+            if start is None or end is None:
+                continue
+            end = min(end, now)
+            if start >= end:
+                continue
+            line_start = text.rfind('\n', 0, range_start) + 1
+            line_end = text.find('\n', match.end())
+            if self.taxonomy.qualifications.find(text[line_start:line_end if line_end != -1 else len(text)]):
+                continue
+            intervals.append((start, end))
+        return round(_union_months(intervals) / 12, 1)
 
     def extract_experience(self, doc) -> List[Dict]:
         experience_keywords = ['experience', 'worked', 'employed', 'position', 'role', 'job', 'project', 'internship']
         experiences = []
         
-        experience_doc = self.nlp(doc.text)
-        for sent in experience_doc.sents:
+        # Reuse the Doc from parse(); only docs without sentence boundaries go through the pipeline again
+        if not doc.has_annotation("SENT_START"):
+            doc = self.nlp(doc.text)
+        for sent in doc.sents:
             if any(keyword in sent.text.lower() for keyword in experience_keywords):
                 experiences.append(sent.text.strip().replace('\n', ' '))
 
         return experiences if experiences else ["No experience details found"]
 
     def extract_skills(self, text: str) -> List[str]:
-        skill_keywords = [
-            'Python', 'Java', 'JavaScript', 'C', 'C++', 'SQL', 'NoSQL', 'HTML', 'CSS', 'React', 'Angular', 'Vue.js', 'Flask',
-            'Node.js', 'Express.js', 'Django', 'Spring', 'Machine Learning', 'Data Analysis', 'Pandas',
-            'NumPy', 'TensorFlow', 'PyTorch', 'OpenCV', 'AWS', 'Azure', 'Google Cloud', 'Docker', 'Kubernetes', 'Git',
-            'JIRA', 'Agile', 'Scrum', 'Project Management', 'Communication', 'MongoDB', 'PostgreSQL', 'MySQL', 'SQLite'
-        ]
-        skills = []
-        for skill in skill_keywords:
-            if re.search(r'\b' + re.escape(skill) + r'\b', text, re.IGNORECASE):
-                skills.append(skill)
-        return list(set(skills)) if skills else ["No skills identified"]
+        skills = self.taxonomy.skills.find(text)
+        return skills if skills else ["No skills identified"]
 
     def parse(self, resume_text: str) -> Dict:
-        doc = self.nlp(resume_text)
-        return {
-            "name": self.extract_name(doc),
-            "email": self.extract_email(resume_text),
-            "phone": self.extract_phone(resume_text),
-            "education_qualifications": self.extract_education(resume_text),
-            "total_experience_years": self.calculate_total_experience(resume_text),
-            "experience_summary": self.extract_experience(doc),
-            "skills": self.extract_skills(resume_text)
-        }
+        with stage("nlp"):
+            doc = self.nlp(resume_text)
+        return self.parse_doc(doc, resume_text)
+
+    def parse_many(self, items: Iterable[Tuple[str, Any]], batch_size: int = 32,
+                   n_process: int = 1) -> Iterator[Tuple[Dict, Any]]:
+        """Parses (resume_text, context) pairs through nlp.pipe and yields (result, context) pairs."""
+        for doc, context in self.nlp.pipe(items, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            yield self.parse_doc(doc, doc.text), context
+
+    def parse_doc(self, doc, resume_text: str) -> Dict:
+        fields = (
+            ("name", self.extract_name, doc),
+            ("email", self.extract_email, resume_text),
+            ("phone", self.extract_phone, resume_text),
+            ("education_qualifications", self.extract_education, resume_text),
+            ("total_experience_years", self.calculate_total_experience, resume_text),
+            ("experience_summary", self.extract_experience, doc),
+            ("skills", self.extract_skills, resume_text),
+        )
+        result = {}
+        for field, extract, source in fields:
+            with stage(extract.__name__):
+                result[field] = extract(source)
+        return result
+
+# --- Shared parser registry ---
+# Loading a spaCy pipeline is expensive, so each process keeps one parser per
+# model and hands the same instance to every caller.
+_parsers: Dict[tuple, ResumeParser] = {}
+_parser_load_seconds: Dict[str, float] = {}
+_parsers_lock = threading.Lock()
+
+WARM_UP_TEXT = "John Doe\njohn@example.com\nSoftware Engineer, Jan 2020 - Present\nPython, SQL"
+
+def _registry_name(model: str, lean: bool) -> str:
+    return f"{model} (lean)" if lean else model
+
+def get_parser(model: str = DEFAULT_MODEL, lean: bool = LEAN_PIPELINE) -> ResumeParser:
+    """Returns the process-wide parser for `model`, loading it on first use."""
+    key = (model, lean)
+    parser = _parsers.get(key)
+    if parser is not None:
+        return parser
+    with _parsers_lock:
+        parser = _parsers.get(key)
+        if parser is None:
+            name = _registry_name(model, lean)
+            start = time.perf_counter()
+            parser = ResumeParser(model, lean=lean)
+            _parser_load_seconds[name] = time.perf_counter() - start
+            logging.info(f"Loaded spaCy model '{name}' in {_parser_load_seconds[name]:.3f}s")
+            _parsers[key] = parser
+    return parser
+
+def warm_up(model: str = DEFAULT_MODEL, lean: bool = LEAN_PIPELINE) -> float:
+    """Loads the parser and runs a small document through it so the first request doesn't pay for it.
+    Returns the model load time in seconds."""
+    get_parser(model, lean).parse(WARM_UP_TEXT)
+    return _parser_load_seconds[_registry_name(model, lean)]
+
+def parser_load_times() -> Dict[str, float]:
+    """Seconds spent loading each model in this process."""
+    return dict(_parser_load_seconds)
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -136,7 +383,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     try:
-        parser = ResumeParser()
+        parser = get_parser()
         resume_text = parser.extract_text_from_pdf(input_file)
         if not resume_text.strip():
             logging.error(f"Failed to extract text from {input_file}. It might be empty or image-based.")
@@ -0,0 +1,65 @@
+"""Production entry point: the web app under gunicorn, plus the resume workers and the email sender.
+
+Usage: python serve.py [--bind HOST:PORT] [--job-workers N] [--no-outbox]
+Web workers, threads and connection limits come from gunicorn.conf.py; per-route
+concurrency limits from app.py's ATS_*_CONCURRENCY settings. `python app.py`
+remains the development server.
+"""
+import os
+import sys
+import signal
+import argparse
+import subprocess
+import importlib.util
+
+import db
+from db import DB_PATH
+from database_setup import create_schema
+from job_queue import start_workers, restart_dead_workers, SUPERVISE_INTERVAL
+from mail_sender import start_outbox_sender
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--bind", help="address to listen on (default: ATS_BIND or 127.0.0.1:8000)")
+    arg_parser.add_argument("--job-workers", type=int, default=int(os.environ.get('ATS_JOB_WORKERS', '2')),
+                            help="resume parsing worker processes; 0 if they run elsewhere (job_queue.py)")
+    arg_parser.add_argument("--no-outbox", dest="outbox", action="store_false",
+                            default=os.environ.get('ATS_OUTBOX_SENDER', '1') == '1',
+                            help="don't send queued email from this process (run mail_sender.py instead)")
+    args = arg_parser.parse_args()
+    if importlib.util.find_spec("gunicorn") is None:
+        arg_parser.error("gunicorn is not installed: pip install gunicorn")
+
+    # Migrations run once here, not in each web worker as it imports the app
+    conn = db.connect(DB_PATH)
+    create_schema(conn)
+    conn.close()
+
+    command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"), "app:app"]
+    if args.bind:
+        command += ["--bind", args.bind]
+    # Gunicorn runs as a child rather than in this process, so its master only
+    # supervises (and reaps) its own web workers
+    server = subprocess.Popen(command, cwd=ROOT)
+
+    workers = start_workers(args.job_workers, DB_PATH) if args.job_workers else []
+    if args.outbox:
+        start_outbox_sender(DB_PATH)
+    print(f"Serving with gunicorn (pid {server.pid}), {len(workers)} resume worker(s). Press CTRL+C to stop.")
+
+    def stop(signum, frame):
+        server.send_signal(signal.SIGTERM)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    # Resume workers and the sender are daemons and go down with this process.
+    # Until gunicorn exits, replace any resume worker that dies.
+    while True:
+        try:
+            sys.exit(server.wait(timeout=SUPERVISE_INTERVAL))
+        except subprocess.TimeoutExpired:
+            restart_dead_workers(workers, DB_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import sqlite3
+import argparse
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import db
+from db import DB_PATH
+from candidate_queries import LIST_COLUMNS
+from skill_matcher import load_taxonomy
+
+DEFAULT_MATCH_LIMIT = 100
+MAX_MATCH_LIMIT = 1000
+BACKFILL_BATCH_SIZE = 1000
+# Placeholder the parser stores when it finds nothing; not a skill
+NO_SKILLS = "No skills identified"
+
+def init_skill_index(conn: sqlite3.Connection) -> None:
+    """Creates the skills dictionary and the candidate_skills inverted index.
+    Existing candidates are backfilled from their skills column the first time."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'candidate_skills'").fetchone()
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS skills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE COLLATE NOCASE
+    );
+    ''')
+    # (skill_id, candidate_id) is the inverted index used for matching;
+    # (candidate_id, skill_id) serves per-candidate rewrites and deletes
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS candidate_skills (
+        candidate_id INTEGER NOT NULL,
+        skill_id INTEGER NOT NULL,
+        PRIMARY KEY (skill_id, candidate_id),
+        FOREIGN KEY (candidate_id) REFERENCES candidates (id),
+        FOREIGN KEY (skill_id) REFERENCES skills (id)
+    ) WITHOUT ROWID;
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate ON candidate_skills (candidate_id, skill_id)")
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_candidate_skills_delete AFTER DELETE ON candidates
+    BEGIN
+        DELETE FROM candidate_skills WHERE candidate_id = OLD.id;
+    END;
+    ''')
+    conn.commit()
+    if not exists:
+        backfill(conn)
+
+def split_skills(skills_text: Optional[str]) -> List[str]:
+    """Skill names from the comma-joined skills column."""
+    if not skills_text:
+        return []
+    return [skill.strip() for skill in skills_text.split(',') if skill.strip() and skill.strip() != NO_SKILLS]
+
+def _skill_ids(conn: sqlite3.Connection, names: Iterable[str], cache: Optional[Dict[str, int]] = None) -> List[int]:
+    """Ids for skill names, adding unknown names to the dictionary."""
+    cache = {} if cache is None else cache
+    ids = []
+    for name in names:
+        key = name.lower()
+        if key not in cache:
+            conn.execute("INSERT OR IGNORE INTO skills (name) VALUES (?)", (name,))
+            cache[key] = conn.execute("SELECT id FROM skills WHERE name = ?", (name,)).fetchone()[0]
+        ids.append(cache[key])
+    return ids
+
+def set_candidate_skills(conn: sqlite3.Connection, candidate_id: int, skills: Sequence[str]) -> None:
+    """Replaces a candidate's rows in the index. The caller commits."""
+    skill_ids = _skill_ids(conn, [skill for skill in skills if skill != NO_SKILLS])
+    conn.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+    conn.executemany("INSERT OR IGNORE INTO candidate_skills (candidate_id, skill_id) VALUES (?, ?)",
+                     [(candidate_id, skill_id) for skill_id in skill_ids])
+
+def backfill(conn: sqlite3.Connection, after_id: int = 0, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Indexes candidates with id > `after_id` from their skills column, in batches.
+    Returns the number of candidates processed."""
+    cache: Dict[str, int] = {}
+    processed = 0
+    last_id = after_id
+    while True:
+        rows = conn.execute("SELECT id, skills FROM candidates WHERE id > ? ORDER BY id LIMIT ?",
+                            (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+        pairs = []
+        for candidate_id, skills_text in rows:
+            for skill_id in _skill_ids(conn, split_skills(skills_text), cache):
+                pairs.append((candidate_id, skill_id))
+        conn.executemany("INSERT OR IGNORE INTO candidate_skills (candidate_id, skill_id) VALUES (?, ?)", pairs)
+        conn.commit()
+        processed += len(rows)
+        last_id = rows[-1][0]
+    return processed
+
+def find_candidates(conn: sqlite3.Connection, all_skills: Sequence[str] = (), any_skills: Sequence[str] = (),
+                    min_experience: Optional[float] = None, max_experience: Optional[float] = None,
+                    limit: int = DEFAULT_MATCH_LIMIT, columns: Sequence[str] = LIST_COLUMNS) -> List[Dict]:
+    """Candidates having every skill in `all_skills` and at least one of `any_skills`,
+    within the experience range, most experienced first. All filtering runs in SQL."""
+    limit = max(1, min(int(limit), MAX_MATCH_LIMIT))
+    taxonomy = load_taxonomy()
+    all_skills = taxonomy.canonical_skills(all_skills)
+    any_skills = taxonomy.canonical_skills(any_skills)
+
+    def ids_for(names: Sequence[str]) -> List[int]:
+        if not names:
+            return []
+        return [row[0] for row in conn.execute(
+            f"SELECT id FROM skills WHERE name IN ({', '.join('?' * len(names))})", names)]
+
+    all_ids = ids_for(all_skills)
+    any_ids = ids_for(any_skills)
+    # An unknown required skill, or no known optional one, can't match anybody
+    if len(all_ids) < len(all_skills) or (any_skills and not any_ids):
+        return []
+
+    sources, where, args = [], [], []
+    if all_ids:
+        # Walk the inverted index and keep candidates that hit every required skill
+        sources.append(f"""
+            SELECT candidate_id FROM candidate_skills
+            WHERE skill_id IN ({', '.join('?' * len(all_ids))})
+            GROUP BY candidate_id HAVING COUNT(*) = {len(all_ids)}
+        """)
+        args.extend(all_ids)
+    if any_ids:
+        sources.append(f"SELECT candidate_id FROM candidate_skills WHERE skill_id IN ({', '.join('?' * len(any_ids))})")
+        args.extend(any_ids)
+    if sources:
+        where.append("c.id IN (" + " INTERSECT ".join(sources) + ")")
+    if min_experience is not None:
+        where.append("c.total_experience_years >= ?")
+        args.append(min_experience)
+    if max_experience is not None:
+        where.append("c.total_experience_years <= ?")
+        args.append(max_experience)
+
+    select = ', '.join(f"c.{column} AS {column}" for column in columns if column != 'id')
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(f"""
+        SELECT c.id{', ' + select if select else ''}
+        FROM candidates c
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY COALESCE(c.total_experience_years, -1) DESC, c.id DESC
+        LIMIT ?
+    """, args + [limit]).fetchall()
+    return [dict(row) for row in rows]
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Build or rebuild the candidate skill index.")
+    arg_parser.add_argument("--db", default=DB_PATH)
+    arg_parser.add_argument("--rebuild", action="store_true", help="drop the index rows and backfill from scratch")
+    args = arg_parser.parse_args()
+
+    conn = db.connect(args.db)
+    init_skill_index(conn)
+    if args.rebuild:
+        conn.execute("DELETE FROM candidate_skills")
+        conn.commit()
+        print(f"Indexed skills for {backfill(conn)} candidate(s).")
+    conn.close()
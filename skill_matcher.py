@@ -0,0 +1,109 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, Iterable, List, Optional
+
+TAXONOMY_PATH = os.environ.get(
+    'ATS_SKILL_TAXONOMY', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skills_taxonomy.json'))
+
+# A term must not be glued to a neighbouring word or to symbols that are part
+# of other skill names ("C" inside "C++", "JS" inside "Vue.js"), nor be the tail of
+# a hyphenated word ("C" in "Objective-C"). A dash bullet ("-Python") still counts.
+_BEFORE = r'(?<![\w+#.])(?<!\w-)'
+_AFTER = r'(?![\w+#])'
+# Case-sensitive terms are short abbreviations; also reject "C-level" or "C's".
+_AFTER_STRICT = r"(?![\w+#'\-])"
+
+def _trie_regex(terms: List[str]) -> str:
+    """Builds a regex alternation factored into a character trie, so matching at a
+    position costs the length of the term rather than the number of terms.
+    Longer terms are preferred; a space in a term matches any run of whitespace."""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = []
+        for char in sorted(node):
+            if char == '':
+                continue
+            token = r'\s+' if char == ' ' else re.escape(char)
+            branches.append(token + build(node[char]))
+        if '' in node:
+            branches.append('')
+        if not branches:
+            return ''
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+def _normalize(term: str) -> str:
+    return ' '.join(term.split())
+
+class TermMatcher:
+    """Finds the canonical names of taxonomy terms in a text with one compiled regex scan."""
+
+    def __init__(self, entries: List[Dict]):
+        self.exact: Dict[str, str] = {}
+        self.folded: Dict[str, str] = {}
+        for entry in entries:
+            for term in [entry['name']] + entry.get('synonyms', []):
+                term = _normalize(term)
+                if entry.get('case_sensitive'):
+                    self.exact[term] = entry['name']
+                else:
+                    self.folded[term.lower()] = entry['name']
+
+        alternatives = []
+        if self.exact:
+            alternatives.append('(?-i:' + _trie_regex(list(self.exact)) + ')' + _AFTER_STRICT)
+        if self.folded:
+            alternatives.append(_trie_regex(list(self.folded)) + _AFTER)
+        self.pattern = re.compile(_BEFORE + '(?:' + '|'.join(alternatives) + ')', re.IGNORECASE) if alternatives else None
+
+    def find(self, text: str) -> List[str]:
+        """Canonical names found in `text`, in order of first appearance."""
+        found: Dict[str, None] = {}
+        if self.pattern is None:
+            return []
+        for match in self.pattern.finditer(text):
+            term = _normalize(match.group(0))
+            name = self.exact.get(term) or self.folded.get(term.lower())
+            if name:
+                found[name] = None
+        return list(found)
+
+class Taxonomy:
+    """Skill and qualification vocabularies loaded from a taxonomy file."""
+
+    def __init__(self, data: Dict):
+        self.version = data.get('version', 1)
+        self.skills = TermMatcher(data.get('skills', []))
+        self.qualifications = TermMatcher(data.get('qualifications', []))
+
+    def canonical_skills(self, names: Iterable[str]) -> List[str]:
+        """Maps free-form skill names onto taxonomy names, so 'Postgres' becomes
+        PostgreSQL. Names the taxonomy doesn't know are kept as given."""
+        canonical: Dict[str, None] = {}
+        for name in names:
+            for skill in self.skills.find(name) or [name.strip()]:
+                canonical[skill] = None
+        return list(canonical)
+
+_taxonomies: Dict[str, Taxonomy] = {}
+_taxonomies_lock = threading.Lock()
+
+def load_taxonomy(path: Optional[str] = None) -> Taxonomy:
+    """Returns the compiled taxonomy for `path`, building it once per process."""
+    path = os.path.abspath(path or TAXONOMY_PATH)
+    with _taxonomies_lock:
+        if path not in _taxonomies:
+            with open(path, encoding='utf-8') as taxonomy_file:
+                _taxonomies[path] = Taxonomy(json.load(taxonomy_file))
+        return _taxonomies[path]
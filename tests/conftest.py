@@ -0,0 +1,52 @@
+import os
+import sys
+import logging
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Modules read the database path when imported; point them at a scratch
+# database rather than ats.db
+os.environ['ATS_DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='ats-tests-'), 'import.db')
+os.environ['ATS_PRELOAD_PARSER'] = '0'
+# resume_parser only sets up its log file if logging isn't configured yet
+logging.getLogger().addHandler(logging.NullHandler())
+
+import db
+from database_setup import create_schema
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """A fresh database with the full schema, built by database_setup.create_schema."""
+    path = str(tmp_path / 'ats.db')
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    connection = db.connect(path)
+    create_schema(connection)
+    connection.close()
+    return path
+
+@pytest.fixture
+def conn(db_path):
+    connection = db.connect(db_path)
+    yield connection
+    connection.close()
+
+@pytest.fixture
+def client(db_path):
+    """A test client for the app, on the fresh database."""
+    from app import app
+    app.config.update(DATABASE=db_path, TESTING=True)
+    yield app.test_client()
+    db.close_pools()
+
+def login(client):
+    client.post('/login', data={'username': 'hr', 'password': 'password'})
+
+def add_candidate(conn, name='Jane Doe', email=None, status='Applied', **fields):
+    """Inserts a candidate and returns its id. The caller commits."""
+    columns = {'name': name, 'email': email or f"{name.lower().replace(' ', '.')}@example.com",
+               'status': status, **fields}
+    return conn.execute(f"INSERT INTO candidates ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        list(columns.values())).lastrowid
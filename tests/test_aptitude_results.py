@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from aptitude_results import apply_results, ResultsFileError
+from tests.conftest import add_candidate
+
+def candidate(conn, email):
+    return conn.execute("SELECT aptitude_score, aptitude_result, status FROM candidates WHERE email = ?",
+                        (email,)).fetchone()
+
+def test_counts_and_outcomes(conn):
+    add_candidate(conn, 'Ann Pass', 'ann@example.com')
+    add_candidate(conn, 'Bob Fail', 'bob@example.com')
+    add_candidate(conn, 'Cy Untested', 'cy@example.com')
+    conn.commit()
+    csv = io.StringIO(
+        "email,score\n"
+        "ann@example.com,70\n"
+        "bob@example.com,95\n"
+        "ghost@example.com,80\n"
+        ",50\n"                      # line 5: no email
+        "bob@example.com,69\n"       # a repeated email keeps its last score
+        "cy@example.com,seventy\n"   # line 7: score isn't a number
+        "other@example.com, 40 \n"
+    )
+    # A small chunk size so the rows span several inserts
+    summary = apply_results(conn, csv, passing_score=70, chunk_size=2)
+
+    assert sorted(summary.pop('unmatched_sample')) == ['ghost@example.com', 'other@example.com']
+    assert summary == {'rows': 7, 'updated': 2, 'unmatched': 2, 'malformed': 2, 'malformed_lines': [5, 7]}
+    assert tuple(candidate(conn, 'ann@example.com')) == (70, 'Cleared', 'Test Cleared')
+    assert tuple(candidate(conn, 'bob@example.com')) == (69, 'Not Cleared', 'Test Failed')
+    assert tuple(candidate(conn, 'cy@example.com')) == (None, None, 'Applied')
+
+def test_repeated_uploads_start_from_an_empty_staging_table(conn):
+    add_candidate(conn, 'Ann Pass', 'ann@example.com')
+    conn.commit()
+    apply_results(conn, io.StringIO("email,score\nghost@example.com,80\n"), passing_score=70)
+    summary = apply_results(conn, io.StringIO("email,score\nann@example.com,90\n"), passing_score=70)
+    assert (summary['updated'], summary['unmatched']) == (1, 0)
+
+@pytest.mark.parametrize("content, message", [
+    ("name,score\nann@example.com,90\n", "'email' and 'score' columns"),
+    ("", "'email' and 'score' columns"),
+])
+def test_missing_columns(conn, content, message):
+    with pytest.raises(ResultsFileError, match=message):
+        apply_results(conn, io.StringIO(content), passing_score=70)
+
+def test_not_utf8(conn):
+    add_candidate(conn, 'Ann Pass', 'ann@example.com')
+    conn.commit()
+    stream = io.TextIOWrapper(io.BytesIO("email,score\nann@example.com,90\nzoë@example.com,80\n".encode('latin-1')),
+                              encoding='utf-8-sig', newline='')
+    with pytest.raises(ResultsFileError, match="UTF-8"):
+        apply_results(conn, stream, passing_score=70)
+    # Nothing from the partly read file is applied
+    assert candidate(conn, 'ann@example.com')[0] is None
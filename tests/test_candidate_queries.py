@@ -0,0 +1,73 @@
+import base64
+import json
+
+import pytest
+
+from candidate_queries import list_candidates, encode_cursor, SORTS
+from tests.conftest import add_candidate
+
+# Ties and NULLs in every sort key
+PEOPLE = [
+    ('Ann', 3.0, 80), ('Bob', 3.0, None), ('Cat', None, 80), ('Dan', 5.5, 95),
+    ('Eve', None, None), ('Ann', 1.0, 60), (None, 3.0, 80), ('Fay', 5.5, 95),
+]
+
+@pytest.fixture
+def people(conn):
+    ids = [add_candidate(conn, name, email=f'person{i}@example.com', total_experience_years=years,
+                         aptitude_score=score)
+           for i, (name, years, score) in enumerate(PEOPLE)]
+    conn.commit()
+    return ids
+
+def all_pages(conn, sort, limit, **filters):
+    seen, cursor = [], None
+    while True:
+        page = list_candidates(conn, sort=sort, cursor=cursor, limit=limit, **filters)
+        seen += [row['id'] for row in page['candidates']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return seen
+
+def expected_order(conn, sort):
+    key, direction = SORTS[sort]
+    return [row[0] for row in conn.execute(f"SELECT c.id FROM candidates c ORDER BY {key} {direction}, c.id {direction}")]
+
+@pytest.mark.parametrize('sort', sorted(SORTS))
+@pytest.mark.parametrize('limit', [1, 2, 3, 50])
+def test_pages_cover_every_row_once_in_order(conn, people, sort, limit):
+    assert all_pages(conn, sort, limit) == expected_order(conn, sort)
+
+def test_nulls_sort_last_in_descending_experience(conn, people):
+    rows = list_candidates(conn, sort='experience', limit=50)['candidates']
+    assert [row['total_experience_years'] for row in rows][-2:] == [None, None]
+
+def test_pages_with_filters(conn, people):
+    assert all_pages(conn, 'score', 1, min_experience=3) == [
+        row['id'] for row in list_candidates(conn, sort='score', limit=50, min_experience=3)['candidates']]
+
+def crafted(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+@pytest.mark.parametrize('sort, cursor', [
+    ('experience', crafted([[], 1])),
+    ('experience', crafted([{}, 1])),
+    ('experience', crafted(['3', 1])),
+    ('experience', crafted([True, 1])),
+    ('name', crafted([3, 1])),
+    ('name', crafted(['Ann', '1'])),
+    ('newest', crafted([1, None])),
+    ('newest', crafted([1, 2, 3])),
+    ('newest', 'not base64!'),
+])
+def test_malformed_cursors_are_value_errors(conn, people, sort, cursor):
+    with pytest.raises(ValueError):
+        list_candidates(conn, sort=sort, cursor=cursor)
+
+def test_encoded_cursor_round_trips(conn, people):
+    page = list_candidates(conn, sort='name', cursor=encode_cursor('Bob', people[1]), limit=50)
+    assert [row['name'] for row in page['candidates']][0] == 'Cat'
+
+def test_api_rejects_a_crafted_cursor_with_400(client):
+    response = client.get(f"/api/candidates?sort=experience&cursor={crafted([[], 1])}")
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+from candidate_search import search_candidates
+from tests.conftest import add_candidate
+
+def indexed(conn, text):
+    return [row[0] for row in conn.execute(
+        "SELECT rowid FROM candidates_fts WHERE candidates_fts MATCH ? ORDER BY rowid", (f'"{text}"',))]
+
+def test_triggers_keep_the_index_in_sync(conn):
+    first = add_candidate(conn, 'Ann Lee', skills='Python, Kubernetes')
+    second = add_candidate(conn, 'Bo Chan', skills='Java')
+    conn.commit()
+    assert indexed(conn, 'kubernetes') == [first]
+
+    conn.execute("UPDATE candidates SET skills = 'Kubernetes, Go' WHERE id = ?", (second,))
+    conn.execute("UPDATE candidates SET skills = 'Python' WHERE id = ?", (first,))
+    conn.commit()
+    assert indexed(conn, 'kubernetes') == [second]
+    assert indexed(conn, 'java') == []
+
+    conn.execute("DELETE FROM candidates WHERE id = ?", (second,))
+    conn.commit()
+    assert indexed(conn, 'kubernetes') == []
+    assert indexed(conn, 'python') == [first]
+    # The external-content index agrees with the table it indexes
+    conn.execute("INSERT INTO candidates_fts (candidates_fts) VALUES ('integrity-check')")
+
+def test_skills_outrank_summary_mentions(conn):
+    add_candidate(conn, 'Summary Only', experience_summary='Helped a team that used Terraform once, among other tools')
+    add_candidate(conn, 'Skilled', skills='Terraform, AWS')
+    add_candidate(conn, 'Unrelated', skills='Excel')
+    conn.commit()
+    assert [row['name'] for row in search_candidates(conn, 'terraform')] == ['Skilled', 'Summary Only']
+    # Prefix matching is on by default
+    assert [row['name'] for row in search_candidates(conn, 'terra')] == ['Skilled', 'Summary Only']
+    assert search_candidates(conn, 'terra', prefix=False) == []
+
+def test_snippets_are_escaped(conn):
+    add_candidate(conn, '<script>alert(1)</script>', skills='Python',
+                  experience_summary='Built <img src=x onerror=alert(1)> tooling in Python & Go')
+    conn.commit()
+    [result] = search_candidates(conn, 'tooling')
+    assert result['snippet'] == 'Built &lt;img src=x onerror=alert(1)&gt; <mark>tooling</mark> in Python &amp; Go'
@@ -0,0 +1,103 @@
+from change_feed import changes_since, current_revision, prune_changes
+from tests.conftest import add_candidate
+
+def ids(rows):
+    return sorted(row['id'] for row in rows)
+
+def test_changes_collapse_to_latest_state(conn):
+    first, second = add_candidate(conn, 'Ann Lee'), add_candidate(conn, 'Bob Roy')
+    conn.commit()
+    changes = changes_since(conn, 0)
+    assert ids(changes['changed']) == [first, second]
+    assert changes['deleted'] == [] and changes['has_more'] is False
+
+    since = changes['cursor']
+    conn.execute("UPDATE candidates SET status = 'Shortlisted' WHERE id = ?", (first,))
+    conn.execute("UPDATE candidates SET status = 'Rejected' WHERE id = ?", (first,))
+    conn.commit()
+    changes = changes_since(conn, since)
+    assert [(row['id'], row['status']) for row in changes['changed']] == [(first, 'Rejected')]
+    assert changes['cursor'] == current_revision(conn)
+
+def test_deletes(conn):
+    kept, deleted = add_candidate(conn, 'Ann Lee'), add_candidate(conn, 'Bob Roy')
+    conn.commit()
+    since = current_revision(conn)
+    conn.execute("UPDATE candidates SET status = 'Shortlisted' WHERE id = ?", (kept,))
+    conn.execute("DELETE FROM candidates WHERE id = ?", (deleted,))
+    conn.commit()
+    changes = changes_since(conn, since)
+    assert ids(changes['changed']) == [kept]
+    assert changes['deleted'] == [deleted]
+
+def test_insert_then_delete_in_one_window_is_a_delete(conn):
+    since = current_revision(conn)
+    candidate_id = add_candidate(conn)
+    conn.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+    conn.commit()
+    changes = changes_since(conn, since)
+    assert changes['changed'] == [] and changes['deleted'] == [candidate_id]
+
+def test_pages_with_a_delete(conn):
+    since = current_revision(conn)
+    first, second = add_candidate(conn, 'Ann Lee'), add_candidate(conn, 'Bob Roy')
+    conn.execute("DELETE FROM candidates WHERE id = ?", (first,))
+    conn.commit()
+    # A candidate appears once, at its latest change: Bob's insert, then Ann's delete
+    page = changes_since(conn, since, limit=1)
+    assert ids(page['changed']) == [second] and page['deleted'] == [] and page['has_more'] is True
+    page = changes_since(conn, page['cursor'], limit=1)
+    assert page['changed'] == [] and page['deleted'] == [first] and page['has_more'] is False
+
+def test_interview_changes_bump_the_candidate(conn):
+    candidate_id = add_candidate(conn)
+    conn.commit()
+    since = current_revision(conn)
+    conn.execute("INSERT INTO interviews (candidate_id, interviewer_name) VALUES (?, 'Sam')", (candidate_id,))
+    conn.commit()
+    assert ids(changes_since(conn, since)['changed']) == [candidate_id]
+
+def test_prune_forces_a_resync(conn):
+    for i in range(10):
+        add_candidate(conn, f'Person {i}')
+    conn.commit()
+    assert prune_changes(conn, keep=3) == 7
+    assert changes_since(conn, 0) is None
+    assert len(changes_since(conn, current_revision(conn) - 3)['changed']) == 3
+
+def test_stream_is_limited_and_closes(client, monkeypatch):
+    from app import app
+    import backpressure
+    monkeypatch.setattr(backpressure, 'QUEUE_TIMEOUT', 0)
+    monkeypatch.setattr(backpressure, '_limits', {})
+    monkeypatch.setitem(app.config, 'STREAM_CONCURRENCY', 1)
+    monkeypatch.setitem(app.config, 'SSE_MAX_SECONDS', 0)
+
+    opened = client.get('/api/candidates/stream', buffered=False)
+    assert opened.status_code == 200
+    # The open stream holds the only slot until it is closed
+    refused = client.get('/api/candidates/stream')
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == str(backpressure.RETRY_AFTER)
+    # With no time left the stream ends after telling the client how soon to reconnect
+    assert b''.join(opened.response).startswith(b'retry: ')
+    opened.close()
+    assert client.get('/api/candidates/stream').status_code == 200
+
+def test_candidate_list_etag(client, conn):
+    add_candidate(conn, 'Ann Lee')
+    conn.commit()
+    first = client.get('/api/candidates?sort=name')
+    etag = first.headers['ETag']
+    assert [row['name'] for row in first.get_json()['candidates']] == ['Ann Lee']
+
+    unchanged = client.get('/api/candidates?sort=name', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304 and unchanged.headers['ETag'] == etag
+    # Another query is another page
+    assert client.get('/api/candidates?sort=newest', headers={'If-None-Match': etag}).status_code == 200
+
+    add_candidate(conn, 'Bo Chan')
+    conn.commit()
+    changed = client.get('/api/candidates?sort=name', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert len(changed.get_json()['candidates']) == 2
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+from resume_parser import ResumeParser
+from skill_matcher import load_taxonomy
+
+@pytest.fixture(scope='module')
+def parser():
+    # calculate_total_experience only needs the taxonomy, not a spaCy model
+    parser = ResumeParser.__new__(ResumeParser)
+    parser.taxonomy = load_taxonomy()
+    return parser
+
+def years_since(year, month):
+    today = date.today()
+    return round(((today.year - year) * 12 + today.month - month) / 12, 1)
+
+@pytest.mark.parametrize('text, years', [
+    ("Engineer, Jan 2015 - Jan 2018", 3.0),
+    ("Engineer, 03/2015 – 09/2016", 1.5),
+    ("Engineer, 2012 - 2014", 2.0),
+    ("Engineer, May 2020 — Jun 2021", 1.1),
+    ("Engineer, Jan, 2020 to Jul, 2020", 0.5),
+    ("Engineer, Dec 2019 - Jan 2019", 0.0),
+])
+def test_formats(parser, text, years):
+    assert parser.calculate_total_experience(text) == years
+
+@pytest.mark.parametrize('end', ["Present", "current", "Now", "to date", "till date"])
+def test_open_ended(parser, end):
+    assert parser.calculate_total_experience(f"Engineer, Jan 2019 - {end}") == years_since(2019, 1)
+
+def test_overlapping_roles_count_once(parser):
+    text = "Engineer, Jan 2015 - Dec 2018\nConsultant, Jun 2017 - Jun 2019\nAdvisor, Jan 2016 - Jan 2017"
+    assert parser.calculate_total_experience(text) == 4.4
+
+def test_gaps_are_not_counted(parser):
+    assert parser.calculate_total_experience("A, Jan 2010 - Jan 2012\nB, Jan 2015 - Jan 2016") == 3.0
+
+def test_future_end_is_clamped(parser):
+    assert parser.calculate_total_experience("Engineer, Jan 2020 - Dec 2099") == years_since(2020, 1)
+
+@pytest.mark.parametrize('text', [
+    "Call 555-2019-2020 after 5pm",
+    "Certified to ISO 9001:2015 - 2016 audit standard",
+    "Ticket 12019-2020",
+    "Ref 2019-2020-118",
+])
+def test_digit_runs_are_not_dates(parser, text):
+    assert parser.calculate_total_experience(text) == 0.0
+
+def test_education_ranges_are_skipped(parser):
+    text = "Education\nUniversity of Pune\n2014 - 2018\n\nExperience\nEngineer, Acme, Jan 2019 - Jan 2021"
+    assert parser.calculate_total_experience(text) == 2.0
+
+def test_only_the_experience_section_counts(parser):
+    text = ("Summary\nBuilt systems since 2010 - 2012 era\nExperience\nEngineer, 2015 - 2017\n"
+            "Projects\nHackathon, Jan 2018 - Jan 2019\nEducation\nB.Tech, 2011 - 2015")
+    assert parser.calculate_total_experience(text) == 2.0
+
+def test_without_headings_skips_qualification_lines(parser):
+    text = "B.Tech, 2010 - 2014\nDeveloper, 2015 - 2017"
+    assert parser.calculate_total_experience(text) == 2.0
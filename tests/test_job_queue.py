@@ -0,0 +1,136 @@
+import sqlite3
+
+import pytest
+
+import job_queue
+from job_queue import enqueue, claim_job, process_job, work_once, requeue_stale, restart_dead_workers, MAX_ATTEMPTS
+from tests.conftest import add_candidate
+
+class FakeParser:
+    cache_version = 'test'
+
+    def __init__(self, error=None, truncated=False):
+        self.error = error
+        self.truncated = truncated
+
+    def extract_pdf(self, file):
+        if self.error:
+            raise self.error
+        return file.read().decode(), self.truncated
+
+    def parse(self, text):
+        return {'phone': '555-0100', 'education_qualifications': ['MBA'], 'total_experience_years': 4.0,
+                'skills': ['Python', 'SQL'], 'experience_summary': [text]}
+
+@pytest.fixture
+def queued(conn, monkeypatch):
+    """Queues a job for a new 'Processing' candidate and returns (candidate_id, job_id)."""
+    monkeypatch.setattr(job_queue, 'get_parser', lambda: FakeParser())
+    candidate_id = add_candidate(conn, status='Processing')
+    job_id = enqueue(conn.cursor(), candidate_id, 'resume.pdf', b'Worked at Acme')
+    conn.commit()
+    return candidate_id, job_id
+
+def candidate(conn, candidate_id):
+    return conn.execute("SELECT * FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+
+def job_status(conn, job_id):
+    return conn.execute("SELECT status FROM resume_jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+def outbox_count(conn):
+    return conn.execute("SELECT COUNT(*) FROM email_outbox").fetchone()[0]
+
+def test_result_moves_processing_candidate_to_applied(conn, queued):
+    candidate_id, job_id = queued
+    process_job(conn, claim_job(conn))
+    row = candidate(conn, candidate_id)
+    assert row['status'] == 'Applied'
+    assert row['skills'] == 'Python, SQL'
+    assert job_status(conn, job_id) == 'done'
+    assert outbox_count(conn) == 1
+
+def test_result_keeps_status_set_while_queued(conn, queued):
+    candidate_id, job_id = queued
+    job = claim_job(conn)
+    conn.execute("UPDATE candidates SET status = 'Shortlisted' WHERE id = ?", (candidate_id,))
+    conn.commit()
+    process_job(conn, job)
+    row = candidate(conn, candidate_id)
+    assert row['status'] == 'Shortlisted'
+    assert row['total_experience_years'] == 4.0
+    assert job_status(conn, job_id) == 'done'
+
+def test_failed_job_keeps_status_set_while_queued(conn, queued, monkeypatch):
+    candidate_id, job_id = queued
+    monkeypatch.setattr(job_queue, 'get_parser', lambda: FakeParser(ValueError('broken PDF')))
+    conn.execute("UPDATE resume_jobs SET attempts = ? WHERE id = ?", (MAX_ATTEMPTS - 1, job_id))
+    conn.execute("UPDATE candidates SET status = 'Rejected' WHERE id = ?", (candidate_id,))
+    conn.commit()
+    process_job(conn, claim_job(conn))
+    assert candidate(conn, candidate_id)['status'] == 'Rejected'
+    assert job_status(conn, job_id) == 'failed'
+    assert outbox_count(conn) == 1
+
+def test_failed_job_is_retried_without_email(conn, queued, monkeypatch):
+    candidate_id, job_id = queued
+    monkeypatch.setattr(job_queue, 'get_parser', lambda: FakeParser(ValueError('broken PDF')))
+    process_job(conn, claim_job(conn))
+    assert job_status(conn, job_id) == 'queued'
+    assert candidate(conn, candidate_id)['status'] == 'Processing'
+    assert outbox_count(conn) == 0
+
+def test_worker_survives_a_database_error(conn, queued, monkeypatch):
+    candidate_id, job_id = queued
+
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(job_queue, '_store_result', locked)
+    assert work_once(conn) is True
+    # Rolled back and requeued, with no email for a result that was never saved
+    assert job_status(conn, job_id) == 'queued'
+    assert candidate(conn, candidate_id)['status'] == 'Processing'
+    assert outbox_count(conn) == 0
+
+    monkeypatch.undo()
+    monkeypatch.setattr(job_queue, 'get_parser', lambda: FakeParser())
+    assert work_once(conn) is True
+    assert job_status(conn, job_id) == 'done'
+    assert work_once(conn) is False
+
+def test_truncated_text_is_not_cached(conn, queued, monkeypatch):
+    monkeypatch.setattr(job_queue, 'get_parser', lambda: FakeParser(truncated=True))
+    candidate_id, job_id = queued
+    process_job(conn, claim_job(conn))
+    assert candidate(conn, candidate_id)['skills'] == 'Python, SQL'
+    assert conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0] == 0
+
+def test_stale_jobs_are_requeued_until_out_of_attempts(conn, queued):
+    candidate_id, job_id = queued
+    claim_job(conn)
+    assert requeue_stale(conn, older_than=-1) == 1
+    assert job_status(conn, job_id) == 'queued'
+
+    # A job that keeps killing its worker gives up like any other failure
+    conn.execute("UPDATE resume_jobs SET status = 'running', attempts = ?, started_at = 0 WHERE id = ?",
+                 (MAX_ATTEMPTS, job_id))
+    conn.commit()
+    assert requeue_stale(conn) == 0
+    assert job_status(conn, job_id) == 'failed'
+    assert candidate(conn, candidate_id)['status'] == 'Applied'
+    assert outbox_count(conn) == 1
+
+class FakeProcess:
+    def __init__(self, name, alive=True):
+        self.name, self.alive, self.exitcode = name, alive, None if alive else -9
+
+    def is_alive(self):
+        return self.alive
+
+def test_dead_workers_are_replaced(monkeypatch):
+    started = []
+    monkeypatch.setattr(job_queue, '_start_worker', lambda db_path, name: started.append(name) or FakeProcess(name))
+    workers = [FakeProcess('resume-worker-0'), FakeProcess('resume-worker-1', alive=False)]
+    assert restart_dead_workers(workers, 'ats.db') == 1
+    assert started == ['resume-worker-1']
+    assert all(worker.is_alive() for worker in workers)
+    assert restart_dead_workers(workers, 'ats.db') == 0
@@ -0,0 +1,105 @@
+import socket
+import sqlite3
+import time
+
+import pytest
+
+aiosmtpd = pytest.importorskip('aiosmtpd.controller')
+
+import mail_sender
+from mail_sender import OutboxSender, queue_email
+
+class Recorder:
+    """aiosmtpd handler that keeps every message, and can refuse the first few."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = []
+        self.refuse = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if session not in self.sessions:
+            self.sessions.append(session)
+        if self.refuse:
+            self.refuse -= 1
+            return '451 Try again later'
+        self.messages.append(envelope.rcpt_tos[0])
+        return '250 OK'
+
+@pytest.fixture
+def smtp(monkeypatch):
+    handler = Recorder()
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    controller = aiosmtpd.Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    monkeypatch.setattr(mail_sender, 'SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setattr(mail_sender, 'SMTP_PORT', port)
+    monkeypatch.setattr(mail_sender, 'SMTP_USE_TLS', False)
+    monkeypatch.setattr(mail_sender, 'EMAIL_SENDER', 'hr@example.com')
+    monkeypatch.setattr(mail_sender, 'EMAIL_PASSWORD', None)
+    yield handler
+    controller.stop()
+
+def queue(conn, count):
+    for i in range(count):
+        queue_email(conn, f"applicant{i}@example.com", "Application Received", "Thank you.")
+    conn.commit()
+
+def statuses(conn):
+    return [tuple(row) for row in conn.execute("SELECT status, attempts FROM email_outbox ORDER BY id")]
+
+def test_batches_over_one_connection(smtp, conn, db_path):
+    queue(conn, 5)
+    sender = OutboxSender(db_path, batch_size=2, rate_per_second=0)
+    assert [sender.send_batch(conn) for _ in range(4)] == [2, 2, 1, 0]
+    sender._disconnect()
+    assert smtp.messages == [f"applicant{i}@example.com" for i in range(5)]
+    assert len(smtp.sessions) == 1
+    assert statuses(conn) == [('sent', 1)] * 5
+
+def test_refused_message_backs_off_then_fails(smtp, conn, db_path):
+    queue(conn, 1)
+    smtp.refuse = 2
+    sender = OutboxSender(db_path, rate_per_second=0, max_attempts=2, backoff_seconds=60)
+    before = time.time()
+    assert sender.send_batch(conn) == 1
+    assert statuses(conn) == [('pending', 1)]
+    assert conn.execute("SELECT next_attempt_at FROM email_outbox").fetchone()[0] >= before + 60
+    # Not due yet
+    assert sender.send_batch(conn) == 0
+
+    conn.execute("UPDATE email_outbox SET next_attempt_at = 0")
+    conn.commit()
+    assert sender.send_batch(conn) == 1
+    assert statuses(conn) == [('failed', 2)]
+    # The failed send dropped the connection; the retry came in on a new one
+    assert len(smtp.sessions) == 2 and smtp.messages == []
+
+def test_only_expired_claims_are_taken_over(smtp, conn, db_path):
+    queue(conn, 2)
+    now = time.time()
+    conn.execute("UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = 1", (now - 10,))
+    conn.execute("UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = 2", (now - 120,))
+    conn.commit()
+    sender = OutboxSender(db_path, rate_per_second=0, lease_seconds=60)
+    assert sender.send_batch(conn) == 1
+    sender._disconnect()
+    assert smtp.messages == ["applicant1@example.com"]
+    assert statuses(conn) == [('sending', 0), ('sent', 1)]
+
+def test_run_survives_database_errors(smtp, db_path, monkeypatch):
+    sender = OutboxSender(db_path, rate_per_second=0, poll_interval=0)
+    calls = []
+
+    def send_batch(conn):
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        sender.stop()
+        return 0
+
+    monkeypatch.setattr(sender, 'send_batch', send_batch)
+    sender.run()
+    assert len(calls) == 2
@@ -0,0 +1,32 @@
+import pytest
+
+import metrics
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    """Drops whatever earlier tests left unflushed in this process."""
+    monkeypatch.setattr(metrics, '_stages', {})
+    monkeypatch.setattr(metrics, '_route_latency', {})
+    monkeypatch.setattr(metrics, '_route_requests', {})
+
+def test_request_metrics_add_up_across_processes(client, conn, fresh_metrics):
+    client.get('/apply')
+    # What another web worker's flush leaves behind
+    conn.execute("INSERT INTO metric_requests (method, route, status, count) VALUES ('GET', '/apply', 200, 4)")
+    conn.execute("INSERT INTO metric_request_buckets (method, route, bucket, count) VALUES ('GET', '/apply', 0, 4)")
+    conn.execute("INSERT INTO metric_request_totals (method, route, sum) VALUES ('GET', '/apply', 0.002)")
+    conn.commit()
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'ats_http_requests_total{method="GET",route="/apply",status="200"} 5' in body
+    assert 'ats_http_request_duration_seconds_count{method="GET",route="/apply"} 5' in body
+    # Scraping flushed this process's figures, so a second scrape doesn't count them twice
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'ats_http_requests_total{method="GET",route="/apply",status="200"} 5' in body
+    assert 'ats_http_requests_total{method="GET",route="/metrics",status="200"} 1' in body
+
+def test_failed_flush_keeps_observations(conn, fresh_metrics):
+    metrics.observe_request('GET', '/apply', 200, 0.01)
+    conn.execute("DROP TABLE metric_requests")
+    metrics.flush_stages(conn)
+    assert metrics._route_requests == {('GET', '/apply', 200): 1}
@@ -0,0 +1,35 @@
+import parse_cache
+
+WEB = "6/en_core_web_sm/taxonomy-1"
+LEAN = "6/en_core_web_sm-lean/taxonomy-1"
+
+def versions(conn):
+    return sorted(row[0] for row in conn.execute("SELECT version FROM parse_cache"))
+
+def test_round_trip_and_stats(conn):
+    digest = parse_cache.content_hash(b"%PDF resume")
+    assert parse_cache.get(conn, digest, WEB) is None
+    parse_cache.put(conn, digest, WEB, "text", {"skills": ["Python"]})
+    assert parse_cache.get(conn, digest, WEB) == ("text", {"skills": ["Python"]})
+    assert parse_cache.get(conn, digest, LEAN) is None
+    stats = parse_cache.stats(conn)
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 2)
+
+def test_eviction_keeps_other_models_of_the_current_version(conn):
+    for version in (WEB, LEAN, "5/en_core_web_sm/taxonomy-1", "6/en_core_web_sm/taxonomy-0"):
+        parse_cache.put(conn, "abc", version, "text", {})
+    parse_cache.evict(conn, WEB)
+    assert versions(conn) == sorted([WEB, LEAN])
+    # And the other parser's pass leaves this one's entries alone
+    parse_cache.evict(conn, LEAN)
+    assert versions(conn) == sorted([WEB, LEAN])
+
+def test_eviction_by_size(conn, monkeypatch):
+    monkeypatch.setattr(parse_cache, "MAX_ENTRIES", 2)
+    for i in range(4):
+        parse_cache.put(conn, f"hash{i}", WEB, "text", {})
+        conn.execute("UPDATE parse_cache SET last_used_at = ? WHERE content_hash = ?", (i, f"hash{i}"))
+    conn.commit()
+    parse_cache.evict(conn, WEB)
+    assert [row[0] for row in conn.execute("SELECT content_hash FROM parse_cache ORDER BY content_hash")] == [
+        "hash2", "hash3"]
@@ -0,0 +1,59 @@
+import io
+import os
+import sys
+
+import pytest
+
+from resume_parser import ResumeParser
+from tests.conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from corpus import render_pdf, LINES_PER_PAGE
+
+pytest.importorskip('PyPDF2')
+
+def pages_read(lines, **limits):
+    return list(ResumeParser.iter_pdf_pages(io.BytesIO(render_pdf(lines)), **limits))
+
+def experience_lines(pages):
+    """Enough dated roles to fill `pages` pages."""
+    return [f"Engineer {i}, Acme Corp, Jan {2000 + i % 20} - Dec {2001 + i % 20}"
+            for i in range(pages * LINES_PER_PAGE)]
+
+# Skills and Education up top, then a long Experience section: every heading has
+# been seen on page 1, but most of the experience is on the pages after it
+LONG_EXPERIENCE = (["Jane Doe", "Skills", "Python, Docker", "Education", "MBA, 2010", "Professional Experience"]
+                   + experience_lines(3) + ["Kubernetes migration, Jan 2020 - Present"])
+
+def test_reads_every_page_by_default():
+    text = "\n".join(pages_read(LONG_EXPERIENCE))
+    assert len(pages_read(LONG_EXPERIENCE)) == 4
+    assert "Kubernetes migration" in text
+
+def test_early_stop_keeps_a_section_that_runs_to_the_end():
+    pages = pages_read(LONG_EXPERIENCE, stop_early=True)
+    assert len(pages) == 4
+    assert "Kubernetes migration" in pages[-1]
+
+def test_early_stop_after_the_last_needed_section_ends():
+    lines = (["Jane Doe", "Education", "MBA, 2010", "Experience"] + experience_lines(2)
+             + ["Skills:", "Python, Docker", "Projects"] + [f"Project {i}" for i in range(3 * LINES_PER_PAGE)])
+    pages = pages_read(lines, stop_early=True)
+    # "Projects" closes Skills on page 3; the pages of projects after it are skipped
+    assert len(pages) == 3
+    assert "Python, Docker" in pages[-1]
+    assert len(pages_read(lines)) == -(-len(lines) // LINES_PER_PAGE)
+
+def test_page_limit():
+    assert len(pages_read(LONG_EXPERIENCE, max_pages=2)) == 2
+
+def test_cut_short_is_reported():
+    pdf = render_pdf(LONG_EXPERIENCE)
+    assert ResumeParser.extract_pdf(io.BytesIO(pdf))[1] is False
+    assert ResumeParser.extract_pdf(io.BytesIO(pdf), max_pages=2)[1] is True
+    assert ResumeParser.extract_pdf(io.BytesIO(pdf), time_budget=-1) == ("", True)
+    # Stopping early skips only pages that aren't needed, so the text is complete
+    lines = (["Jane Doe", "Education", "MBA, 2010", "Experience", "Engineer, Jan 2015 - Present", "Skills:",
+              "Python", "Projects"] + [f"Project {i}" for i in range(2 * LINES_PER_PAGE)])
+    text, truncated = ResumeParser.extract_pdf(io.BytesIO(render_pdf(lines)), stop_early=True)
+    assert not truncated and "Project 0" in text and f"Project {2 * LINES_PER_PAGE - 1}" not in text
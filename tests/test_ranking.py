@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip('scipy')
+
+from ranking import RankingIndex
+from tests.conftest import add_candidate, login
+
+def test_aliases_resolve_like_match():
+    index = RankingIndex()
+    index.add(1, ['PostgreSQL', 'JavaScript'], 5, "Built web apps")
+    index.add(2, ['PostgreSQL'], 2, "Ran databases")
+    assert index.resolve_skills(['Postgres', 'JS', 'Basket weaving']) == (
+        ['postgresql', 'javascript'], ['Basket weaving'])
+
+    scored = index.scores("Developer", required_skills=['Postgres', 'JS', 'Basket weaving'])
+    # Divided by the two skills that resolved, not all three
+    assert scored['skills'].tolist() == [1.0, 0.5]
+
+def test_rank_endpoint_reports_unknown_skills(client, conn, monkeypatch):
+    import app
+    # The index is per process; start from this test's database
+    monkeypatch.setattr(app, '_ranking_index', None)
+    add_candidate(conn, 'Pat Postgres', skills='PostgreSQL, Python', total_experience_years=4)
+    add_candidate(conn, 'Nia Nothing', skills='Excel', total_experience_years=4)
+    conn.commit()
+    login(client)
+    response = client.post('/api/rank', json={'job_description': 'Backend engineer',
+                                              'skills': 'Postgres, Basket weaving'})
+    body = response.get_json()
+    assert body['unknown_skills'] == ['Basket weaving']
+    assert [(result['name'], result['skills_score']) for result in body['results']] == [
+        ('Pat Postgres', 1.0), ('Nia Nothing', 0.0)]
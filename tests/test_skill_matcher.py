@@ -0,0 +1,20 @@
+import pytest
+
+from skill_matcher import load_taxonomy
+
+@pytest.fixture(scope='module')
+def skills():
+    return load_taxonomy().skills
+
+@pytest.mark.parametrize("text", ["Objective-C developer", "Fluent in Objective-C and Swift-C interop", "C-level exec"])
+def test_hyphenated_words_are_not_skills(skills, text):
+    assert 'C' not in skills.find(text)
+
+@pytest.mark.parametrize("text, expected", [
+    ("C and C++", ['C', 'C++']),
+    ("Built a Vue.js front end", ['Vue.js']),
+    ("Skills:\n-Python\n- Docker", ['Python', 'Docker']),
+    ("Python-based tooling", ['Python']),
+])
+def test_skill_boundaries(skills, text, expected):
+    assert skills.find(text) == expected
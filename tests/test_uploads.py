@@ -0,0 +1,42 @@
+import io
+import os
+import sys
+import subprocess
+
+from tests.conftest import ROOT, login, add_candidate
+
+def test_only_resume_uploads_are_size_capped(client, conn, monkeypatch):
+    from app import app
+    monkeypatch.setitem(app.config, 'UPLOAD_MAX_CONTENT_LENGTH', 4096)
+    resume = {'name': 'Jane Doe', 'email': 'jane@example.com',
+              'resume': (io.BytesIO(b'%PDF' + b'0' * 8192), 'resume.pdf')}
+    assert client.post('/upload', data=resume).status_code == 413
+
+    add_candidate(conn, email='jane@example.com')
+    conn.commit()
+    rows = ''.join(f"nobody{i}@example.com,50\n" for i in range(400))
+    results = io.BytesIO(f"email,score\njane@example.com,90\n{rows}".encode())
+    login(client)
+    response = client.post('/upload_results', data={'results_file': (results, 'results.csv')})
+    assert response.status_code == 302
+    assert conn.execute("SELECT aptitude_score FROM candidates WHERE email = 'jane@example.com'").fetchone()[0] == 90
+
+def test_job_status_is_private_to_the_uploading_session(client, monkeypatch):
+    from app import app
+    monkeypatch.setitem(app.config, 'UPLOAD_CONCURRENCY', 0)
+    resume = {'name': 'Jane Doe', 'email': 'jane@example.com',
+              'resume': (io.BytesIO(b'%PDF-1.4 resume'), 'resume.pdf')}
+    response = client.post('/upload', data=resume)
+    job_id = int(response.headers['Location'].rsplit('=', 1)[1])
+    assert client.get(f'/api/jobs/{job_id}').get_json()['status'] == 'queued'
+
+    stranger = app.test_client()
+    assert stranger.get(f'/api/jobs/{job_id}').status_code == 404
+    login(stranger)
+    assert stranger.get(f'/api/jobs/{job_id}').get_json()['id'] == job_id
+
+def test_app_imports_against_an_empty_database(tmp_path):
+    # Importing the app (as each gunicorn worker does) runs no DDL and needs no schema
+    env = {**os.environ, 'ATS_DB_PATH': str(tmp_path / 'empty.db')}
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=ROOT, env=env, check=True)
+    assert not (tmp_path / 'empty.db').exists() or (tmp_path / 'empty.db').stat().st_size == 0